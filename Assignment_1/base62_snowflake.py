@@ -5,53 +5,135 @@ from flask import Flask, request, jsonify
 import base62
 
 
+# Default epoch for the millisecond layout: 2024-01-01T00:00:00Z
+SNOWFLAKE_EPOCH_MS = 1704067200000
+
+
 class Base62SnowflakeIDGenerator:
-    def __init__(self, machine_id):
-        self.machine_id = machine_id
+    def __init__(self, machine_id, timestamp_bits=31, machine_id_bits=5, sequence_bits=5,
+                 time_unit_ms=1000, epoch_ms=0, wait_mode="spin", thread_block_size=0):
         self.sequence = 0
         self.last_timestamp = -1
         self.lock = threading.Lock()
 
-        self.timestamp_bits = 31
-        self.machine_id_bits = 5
-        self.sequence_bits = 5
-
+        # wait_mode: "spin" polls the clock, "sleep" sleeps until the next tick starts.
+        # thread_block_size > 0 gives every thread its own sub-range of sequence numbers,
+        # so the shared lock is only taken once per block instead of once per ID.
+        if wait_mode not in ("spin", "sleep"):
+            raise ValueError("wait_mode must be 'spin' or 'sleep'")
+        self.wait_mode = wait_mode
+        self.thread_block_size = thread_block_size
+        self.local = threading.local()
+
+        # Layout: | timestamp | machine_id | sequence |
+        # time_unit_ms is the length of one timestamp tick (1000 = seconds, 1 = milliseconds),
+        # epoch_ms is subtracted from the wall clock so the timestamp field lasts longer.
+        self.timestamp_bits = timestamp_bits
+        self.machine_id_bits = machine_id_bits
+        self.sequence_bits = sequence_bits
+        self.time_unit_ms = time_unit_ms
+        self.epoch_ms = epoch_ms
+
+        self.max_timestamp = (1 << self.timestamp_bits) - 1
         self.max_machine_id = (1 << self.machine_id_bits) - 1
         self.max_sequence = (1 << self.sequence_bits) - 1
 
         self.timestamp_shift = self.machine_id_bits + self.sequence_bits
         self.machine_id_shift = self.sequence_bits
 
+        if not 0 <= machine_id <= self.max_machine_id:
+            raise ValueError("machine_id must be between 0 and {}".format(self.max_machine_id))
+        self.machine_id = machine_id
+
+    @classmethod
+    def millisecond_layout(cls, machine_id, epoch_ms=SNOWFLAKE_EPOCH_MS, **kwargs):
+        # 41 bits of milliseconds (~69 years), 10 machine bits, 12 sequence bits
+        return cls(machine_id, timestamp_bits=41, machine_id_bits=10, sequence_bits=12,
+                   time_unit_ms=1, epoch_ms=epoch_ms, **kwargs)
+
     def current_timestamp(self):
-        return int(time.time())
+        timestamp = (time.time_ns() // 1_000_000 - self.epoch_ms) // self.time_unit_ms
+        if timestamp > self.max_timestamp:
+            raise OverflowError("Timestamp does not fit in {} bits".format(self.timestamp_bits))
+        return timestamp
 
     def wait_for_next_timestamp(self, last_timestamp):
         timestamp = self.current_timestamp()
         while timestamp <= last_timestamp:
+            if self.wait_mode == "sleep":
+                next_tick_ms = self.epoch_ms + (last_timestamp + 1) * self.time_unit_ms
+                time.sleep(max(next_tick_ms * 1_000_000 - time.time_ns(), 0) / 1e9)
             timestamp = self.current_timestamp()
         return timestamp
 
-    def generate_id(self):
-        with self.lock:
-            timestamp = self.current_timestamp()
+    def reserve_block(self, count):
+        # Must be called with self.lock held.
+        # Returns (timestamp, first_sequence, reserved) with 1 <= reserved <= count.
+        timestamp = self.current_timestamp()
 
-            if timestamp == self.last_timestamp:
-                self.sequence = (self.sequence + 1) & self.max_sequence
-                if self.sequence == 0:
-                    timestamp = self.wait_for_next_timestamp(self.last_timestamp)
-            else:
-                self.sequence = 0
+        if timestamp <= self.last_timestamp:
+            # Same tick (or the clock stepped back): continue the current sequence
+            timestamp = self.last_timestamp
+            first_sequence = self.sequence + 1
+            if first_sequence > self.max_sequence:
+                timestamp = self.wait_for_next_timestamp(self.last_timestamp)
+                first_sequence = 0
+        else:
+            first_sequence = 0
+
+        reserved = min(count, self.max_sequence - first_sequence + 1)
+        self.last_timestamp = timestamp
+        self.sequence = first_sequence + reserved - 1
+        return timestamp, first_sequence, reserved
+
+    def compose_id(self, timestamp, sequence):
+        return (
+                (timestamp << self.timestamp_shift) |
+                (self.machine_id << self.machine_id_shift) |
+                sequence
+        )
 
-            self.last_timestamp = timestamp
+    def generate_id(self):
+        if self.thread_block_size > 0:
+            return base62.encode(self.next_thread_local_id())
+
+        with self.lock:
+            timestamp, sequence, _ = self.reserve_block(1)
+
+        return base62.encode(self.compose_id(timestamp, sequence))
+
+    def next_thread_local_id(self):
+        # Hand out the next ID from this thread's sub-range. The block is dropped once the
+        # clock has moved to a later tick, so IDs stay close to their creation time.
+        local = self.local
+        block = getattr(local, "block", None)
+        if block is None or block[1] >= block[2] or block[0] < self.current_timestamp():
+            with self.lock:
+                timestamp, first_sequence, reserved = self.reserve_block(self.thread_block_size)
+            block = [timestamp, first_sequence, first_sequence + reserved]
+            local.block = block
+
+        sequence = block[1]
+        block[1] += 1
+        return self.compose_id(block[0], sequence)
+
+    def generate_ids(self, n):
+        # Reserve n IDs under a single lock acquisition, encode them afterwards
+        blocks = []
+        with self.lock:
+            remaining = n
+            while remaining > 0:
+                timestamp, first_sequence, reserved = self.reserve_block(remaining)
+                blocks.append((timestamp, first_sequence, reserved))
+                remaining -= reserved
 
-            id = (
-                    (timestamp << self.timestamp_shift) |
-                    (self.machine_id << self.machine_id_shift) |
-                    self.sequence
-            )
+        ids = []
+        for timestamp, first_sequence, reserved in blocks:
+            base = self.compose_id(timestamp, 0)
+            ids.extend(base62.encode(base | sequence)
+                       for sequence in range(first_sequence, first_sequence + reserved))
+        return ids
 
-            id = base62.encode(id)
-            return id
 
 # Source: https://stackoverflow.com/a/17773849
 URL_REGEX = re.compile(
@@ -67,7 +149,7 @@ app = Flask(__name__)
 url_mapping = {}
 stats_mapping = {}
 
-id_generator = Base62SnowflakeIDGenerator(machine_id=1)
+id_generator = Base62SnowflakeIDGenerator.millisecond_layout(machine_id=1, wait_mode="sleep")
 
 
 @app.route('/', methods=['POST'])
@@ -1,14 +1,19 @@
+import os
+import hmac
+import secrets
+import time
 from flask import Flask,request,jsonify
-from werkzeug.security import generate_password_hash, check_password_hash
 from flask_sqlalchemy import SQLAlchemy
 import jwt
+from password_hasher import PasswordHasher, HasherBusy
+from revocation import RevocationList
 
 
 app = Flask(__name__)
 
 
 # Database (SQLite)
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///users.db'  
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('USERS_DB_URI', 'sqlite:///users.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 db = SQLAlchemy(app)
 db_path = "instance/users.db"
@@ -16,11 +21,60 @@ class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False)
     password_hash = db.Column(db.String(128), nullable=False)
+# Long-lived tokens that mint new access tokens without the password. The client holds
+# "<id>.<HMAC of id>"; only the id is stored, looked up by primary key.
+class RefreshToken(db.Model):
+    id = db.Column(db.String(43), primary_key=True)
+    username = db.Column(db.String(80), index=True, nullable=False)
+    expires_at = db.Column(db.Float, nullable=False)
+    revoked = db.Column(db.Boolean, nullable=False, default=False)
 with app.app_context():
     db.create_all()
 
 # 🌟
 SECRET_KEY = "need_to_find_a_way_to_hind_this"
+app.config['REFRESH_TOKEN_DAYS'] = float(os.environ.get('REFRESH_TOKEN_DAYS', 30))
+
+# Password hashing runs in its own worker processes; requests beyond the queue depth get a 503
+app.config['HASH_WORKERS'] = int(os.environ.get('HASH_WORKERS', os.cpu_count() or 1))
+app.config['HASH_QUEUE_DEPTH'] = int(os.environ.get('HASH_QUEUE_DEPTH', app.config['HASH_WORKERS'] * 4))
+app.config['PASSWORD_HASH_METHOD'] = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt')
+hasher = PasswordHasher(app.config['HASH_WORKERS'], app.config['HASH_QUEUE_DEPTH'],
+                        app.config['PASSWORD_HASH_METHOD'])
+
+# Access tokens revoked by logout and password change; the shortener polls the same table
+app.config['REVOCATION_DB'] = os.environ.get('REVOCATION_DB', os.path.join(app.instance_path, 'revoked.db'))
+revocations = RevocationList(app.config['REVOCATION_DB'], poll_interval=None)
+
+@app.errorhandler(HasherBusy)
+def hasher_busy(e):
+    return jsonify({'error':'Service busy: too many password checks in progress', "token":"wrong"}),503,{'Retry-After':'1'}
+
+def refresh_signature(token_id):
+    # The prefix keeps these signatures apart from JWT ones made with the same key
+    return jwt.get_codec(SECRET_KEY).sign("refresh." + token_id)
+
+def issue_refresh_token(username):
+    now = time.time()
+    # Expired tokens of this user go away whenever a new one is issued
+    RefreshToken.query.filter(RefreshToken.username == username, RefreshToken.expires_at < now).delete()
+    token_id = secrets.token_urlsafe(32)
+    db.session.add(RefreshToken(id=token_id, username=username,
+                                expires_at=now + app.config['REFRESH_TOKEN_DAYS'] * 86400))
+    db.session.commit()
+    return f"{token_id}.{refresh_signature(token_id)}"
+
+def find_refresh_token(refresh_token):
+    # HMAC check first, so forged tokens never reach the database
+    if not isinstance(refresh_token, str):
+        return None
+    token_id, _, signature = refresh_token.partition(".")
+    if not signature.isascii() or not hmac.compare_digest(refresh_signature(token_id), signature):
+        return None
+    token = db.session.get(RefreshToken, token_id)
+    if token is None or token.revoked or token.expires_at < time.time():
+        return None
+    return token
 
 @app.route('/users',methods = ['POST'])
 def register_user():
@@ -35,7 +89,7 @@ def register_user():
     if existing_user:
         return jsonify({'error':'Duplicate: Username already exists'}),409
     
-    password_hash = generate_password_hash(password)
+    password_hash = hasher.hash(password)
     new_user = User(username=username, password_hash=password_hash)
     db.session.add(new_user)
     db.session.commit()
@@ -54,12 +108,15 @@ def update_password():
     user = User.query.filter_by(username=username).first()
 
     if user:
-        if not check_password_hash(user.password_hash,old_pwd):
+        if not hasher.check(user.password_hash,old_pwd):
             print('Forbidden: Incorrect old password')
             return jsonify({'error':'Forbidden: Incorrect old password'}),403
         
-        user.password_hash = generate_password_hash(new_pwd)
+        user.password_hash = hasher.hash(new_pwd)
+        RefreshToken.query.filter_by(username=username).update({'revoked': True})
         db.session.commit()
+        now = time.time()
+        revocations.revoke_user(username, now, now + jwt.ACCESS_TOKEN_HOURS * 3600)
         print('{}\'s password is updated successfully'.format(username))
         return jsonify({'message':'{}\'s password is updated successfully'.format(username)}),200
     else:
@@ -78,15 +135,42 @@ def login_user():
     user = User.query.filter_by(username=username).first()
 
     if user:
-        if not check_password_hash(user.password_hash,password):
+        if not hasher.check(user.password_hash,password):
             print("Incorrect password")
             return jsonify({'error':'Forbidden: Incorrect password', "token":"wrong"}),403
         print('Token Generated')
         token = jwt.generate_jwt(username, SECRET_KEY)
-        return jsonify({'token':token}),200
+        return jsonify({'token':token, 'refresh_token':issue_refresh_token(username)}),200
     else:
         print('User doesn\'t exist')
         return jsonify({'error':'User doesn\'t exist', "token":"wrong"}),400
 
+@app.route('/users/refresh', methods = ['POST'])
+def refresh_access_token():
+    data = request.get_json(silent=True) or {}
+    token = find_refresh_token(data.get('refresh_token'))
+    if token is None:
+        return jsonify({'error':'Forbidden: Invalid, expired or revoked refresh token', "token":"wrong"}),403
+    return jsonify({'token':jwt.generate_jwt(token.username, SECRET_KEY)}),200
+
+@app.route('/users/logout', methods = ['POST'])
+def logout_user():
+    data = request.get_json(silent=True) or {}
+    token = find_refresh_token(data.get('refresh_token'))
+    if token is None:
+        return jsonify({'error':'Forbidden: Invalid, expired or revoked refresh token'}),403
+    token.revoked = True
+    db.session.commit()
+    # The access token, when sent along, stops working too
+    access_token = request.headers.get('Authorization')
+    if access_token:
+        try:
+            claims = jwt.get_codec(SECRET_KEY).decode(access_token)
+        except ValueError:
+            claims = None
+        if claims is not None and claims.get('username') == token.username:
+            revocations.revoke_token(access_token, claims['exp'])
+    return jsonify({'message':'Logged out'}),200
+
 if __name__ == '__main__':
     app.run(debug=True, port=8001)
@@ -0,0 +1,64 @@
+# Table-driven base62 codec, compatible with pybase62's default charset.
+# Digits are converted two at a time through precomputed lookup tables.
+
+BASE = 62
+CHARSET = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+PAIR_BASE = BASE * BASE
+
+# PAIRS[n] is the zero-padded two-digit encoding of n, HEADS[n] the unpadded one
+PAIRS = [a + b for a in CHARSET for b in CHARSET]
+HEADS = list(CHARSET) + PAIRS[BASE:]
+PAIR_VALUES = {pair: value for value, pair in enumerate(PAIRS)}
+CHAR_VALUES = {char: value for value, char in enumerate(CHARSET)}
+
+
+def encode(n):
+    if n < 0:
+        raise ValueError("Cannot encode negative numbers")
+    if n < PAIR_BASE:
+        return HEADS[n]
+
+    chunks = []
+    while n >= PAIR_BASE:
+        n, r = divmod(n, PAIR_BASE)
+        chunks.append(PAIRS[r])
+    chunks.append(HEADS[n])
+    chunks.reverse()
+    return "".join(chunks)
+
+
+def decode(encoded):
+    try:
+        if len(encoded) % 2:
+            value = CHAR_VALUES[encoded[0]]
+            start = 1
+        else:
+            value = 0
+            start = 0
+        for i in range(start, len(encoded), 2):
+            value = value * PAIR_BASE + PAIR_VALUES[encoded[i:i + 2]]
+    except KeyError:
+        raise ValueError("Invalid base62 string: {!r}".format(encoded))
+    return value
+
+
+def encode_many(numbers):
+    # Same as [encode(n) for n in numbers] with the lookups hoisted out of the loop
+    pairs, heads, pair_base = PAIRS, HEADS, PAIR_BASE
+    result = []
+    append = result.append
+    for n in numbers:
+        if n < 0:
+            raise ValueError("Cannot encode negative numbers")
+        chunks = []
+        while n >= pair_base:
+            n, r = divmod(n, pair_base)
+            chunks.append(pairs[r])
+        chunks.append(heads[n])
+        chunks.reverse()
+        append("".join(chunks))
+    return result
+
+
+def decode_many(encoded_strings):
+    return [decode(encoded) for encoded in encoded_strings]
@@ -0,0 +1,32 @@
+# Microbenchmark: base62_codec against pybase62
+# Usage: python bench_base62.py [count]
+import sys
+import time
+import random
+import base62
+import base62_codec
+
+
+def timed(label, fn, count):
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print("{:<32} {:>10.1f} ns/op".format(label, elapsed / count * 1e9))
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    # 63-bit values as produced by the millisecond Snowflake layout
+    numbers = [random.getrandbits(63) for _ in range(count)]
+    encoded = [base62.encode(n) for n in numbers]
+
+    timed("base62.encode", lambda: [base62.encode(n) for n in numbers], count)
+    timed("base62_codec.encode", lambda: [base62_codec.encode(n) for n in numbers], count)
+    timed("base62_codec.encode_many", lambda: base62_codec.encode_many(numbers), count)
+    timed("base62.decode", lambda: [base62.decode(s) for s in encoded], count)
+    timed("base62_codec.decode", lambda: [base62_codec.decode(s) for s in encoded], count)
+    timed("base62_codec.decode_many", lambda: base62_codec.decode_many(encoded), count)
+
+
+if __name__ == '__main__':
+    main()
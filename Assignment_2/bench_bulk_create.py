@@ -0,0 +1,33 @@
+# N single POST / against one POST /_batch with N URLs (Flask test client)
+# Usage: URL_STORE=memory|oplog|sqlite python bench_bulk_create.py [count]
+import sys
+import time
+import jwt
+import url_shortener
+from authenticator import SECRET_KEY
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    client = url_shortener.app.test_client()
+    headers = {'Authorization': jwt.generate_jwt('bench', SECRET_KEY)}
+    urls = ['https://example.com/page/{}'.format(i) for i in range(count)]
+
+    start = time.perf_counter()
+    for url in urls:
+        client.post('/', json={'value': url}, headers=headers)
+    single = time.perf_counter() - start
+
+    start = time.perf_counter()
+    response = client.post('/_batch', json={'values': urls}, headers=headers)
+    batch = time.perf_counter() - start
+    assert response.status_code == 201 and len(response.get_json()['results']) == count
+
+    print("store:           {}".format(url_shortener.app.config['URL_STORE']))
+    print("{:,} single POSTs: {:>8.3f} s".format(count, single))
+    print("1 batch POST:     {:>8.3f} s".format(batch))
+    print("speed-up:         {:>8.1f}x".format(single / batch))
+
+
+if __name__ == '__main__':
+    main()
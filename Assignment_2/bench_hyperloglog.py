@@ -0,0 +1,33 @@
+# HyperLogLog against an exact set of visitor keys: accuracy, memory and add() cost
+# Usage: python bench_hyperloglog.py [p]
+import sys
+import time
+from hyperloglog import HyperLogLog
+
+SIZES = [100, 1000, 10000, 100000, 1000000]
+
+
+def set_memory(visitors):
+    return sys.getsizeof(visitors) + sum(sys.getsizeof(v) for v in visitors)
+
+
+def main():
+    p = int(sys.argv[1]) if len(sys.argv) > 1 else 11
+    print("{:>10} {:>10} {:>8} {:>12} {:>12} {:>10}".format(
+        "visitors", "estimate", "error", "set memory", "HLL memory", "add (us)"))
+    for n in SIZES:
+        keys = ["203.0.{}.{}|Mozilla/5.0 ({})".format(i % 256, i // 256 % 256, i) for i in range(n)]
+        exact = set(keys)
+        sketch = HyperLogLog(p)
+        start = time.perf_counter()
+        for key in keys:
+            sketch.add(key)
+        add_us = (time.perf_counter() - start) / n * 1e6
+        estimate = sketch.count()
+        print("{:>10,} {:>10,} {:>7.2f}% {:>11,}B {:>11,}B {:>10.2f}".format(
+            len(exact), estimate, abs(estimate - len(exact)) / len(exact) * 100,
+            set_memory(exact), sys.getsizeof(sketch.registers), add_us))
+
+
+if __name__ == '__main__':
+    main()
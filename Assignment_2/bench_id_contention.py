@@ -0,0 +1,54 @@
+# Contention benchmark for Base62SnowflakeIDGenerator
+# Usage: python bench_id_contention.py [ids_per_thread]
+import sys
+import time
+import threading
+from id_engines import Base62SnowflakeIDGenerator
+
+THREAD_COUNTS = [1, 8, 32]
+
+CONFIGS = [
+    ("spin, shared lock", dict(wait_mode="spin")),
+    ("sleep, shared lock", dict(wait_mode="sleep")),
+    ("sleep, per-thread blocks", dict(wait_mode="sleep", thread_block_size=64)),
+]
+
+
+def run(generator, threads, ids_per_thread):
+    waits = [[] for _ in range(threads)]
+    barrier = threading.Barrier(threads + 1)
+
+    def worker(index):
+        samples = waits[index]
+        barrier.wait()
+        for _ in range(ids_per_thread):
+            start = time.perf_counter_ns()
+            generator.generate_id()
+            samples.append(time.perf_counter_ns() - start)
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for w in workers:
+        w.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - start
+
+    all_waits = sorted(sample for samples in waits for sample in samples)
+    p99 = all_waits[int(len(all_waits) * 0.99) - 1]
+    return len(all_waits) / elapsed, p99 / 1000
+
+
+def main():
+    ids_per_thread = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    print("{:<26} {:>8} {:>14} {:>12}".format("mode", "threads", "IDs/sec", "p99 (us)"))
+    for name, kwargs in CONFIGS:
+        for threads in THREAD_COUNTS:
+            generator = Base62SnowflakeIDGenerator.millisecond_layout(machine_id=1, **kwargs)
+            rate, p99 = run(generator, threads, ids_per_thread)
+            print("{:<26} {:>8} {:>14,.0f} {:>12.1f}".format(name, threads, rate, p99))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+# Login (check_password_hash) throughput from 16 request threads: inline on the threads vs a
+# PasswordHasher pool of 1, 2, 4, ... worker processes up to the number of cores
+# Usage: python bench_password_hashing.py [checks] [werkzeug hash method]
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from password_hasher import PasswordHasher
+
+THREADS = 16
+
+
+def rate(hasher, password_hash, checks):
+    with ThreadPoolExecutor(THREADS) as threads:
+        # Warm up, so starting the worker processes is not timed
+        list(threads.map(lambda _: hasher.check(password_hash, "secret"), range(THREADS)))
+        start = time.perf_counter()
+        list(threads.map(lambda _: hasher.check(password_hash, "secret"), range(checks)))
+    return checks / (time.perf_counter() - start)
+
+
+def main():
+    checks = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    method = sys.argv[2] if len(sys.argv) > 2 else "scrypt"
+    password_hash = PasswordHasher(workers=0, method=method).hash("secret")
+    cores = os.cpu_count() or 1
+
+    print("{} checks, method {}, {} cores".format(checks, method, cores))
+    print("inline:      {:>8,.1f} logins/sec".format(rate(PasswordHasher(workers=0, max_pending=checks),
+                                                            password_hash, checks)))
+    workers = 1
+    while True:
+        hasher = PasswordHasher(workers=workers, max_pending=checks)
+        print("{:>2} workers:  {:>8,.1f} logins/sec".format(workers, rate(hasher, password_hash, checks)))
+        hasher.close()
+        if workers >= cores:
+            break
+        workers = min(workers * 2, cores)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+# Memory per link: the old url_mapping/stats_mapping dicts against LinkRecord
+# Usage: python bench_record_memory.py [links]
+import sys
+import time
+import tracemalloc
+from storage import InMemoryURLStore
+
+
+def make_link(i):
+    # Usernames come out of a fresh JWT decode on every request, so each link
+    # gets its own copy of the string unless it is interned
+    return "id{:010d}".format(i), "https://example.com/{}".format(i), "".join(["user", str(i % 10000)])
+
+
+def build_dicts(links):
+    url_mapping = {}
+    stats_mapping = {}
+    for i in range(links):
+        short_id, url, username = make_link(i)
+        url_mapping[short_id] = {"url": url, "username": username}
+        stats_mapping[short_id] = {"clicks": 0, "created_at": time.time(), "last_accessed": None,
+                                   "username": username}
+    return url_mapping, stats_mapping
+
+
+def build_records(links):
+    store = InMemoryURLStore()
+    for i in range(links):
+        short_id, url, username = make_link(i)
+        store.create(short_id, url, username, time.time())
+    return store
+
+
+def measure(build, links):
+    tracemalloc.start()
+    result = build(links)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return size
+
+
+def main():
+    links = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    before = measure(build_dicts, links)
+    after = measure(build_records, links)
+    scale = 1000000 / links
+    print("two dicts per link:   {:>8.1f} MB per million links".format(before * scale / 1e6))
+    print("LinkRecord per link:  {:>8.1f} MB per million links".format(after * scale / 1e6))
+    print("ratio:                {:>8.2f}x".format(before / after))
+
+
+if __name__ == '__main__':
+    main()
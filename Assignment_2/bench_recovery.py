@@ -0,0 +1,49 @@
+# Restart-time benchmark for the oplog-backed in-memory store
+# Usage: python bench_recovery.py [links] [tail_operations]
+import os
+import sys
+import time
+import shutil
+import tempfile
+from storage import LoggedInMemoryURLStore
+
+
+def main():
+    links = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    tail = int(sys.argv[2]) if len(sys.argv) > 2 else 10000
+    directory = tempfile.mkdtemp(prefix="oplog-bench-")
+    try:
+        # Load the records directly and snapshot them; going through create() would
+        # also write every link to the log
+        store = LoggedInMemoryURLStore(directory, snapshot_interval=0, wait_for_sync=False)
+        for i in range(links):
+            short_id = "id{:010d}".format(i)
+            store.load_record(short_id, "https://example.com/page/{}".format(i), "user{}".format(i % 10000),
+                              i % 7, 1700000000.0 + i, None)
+        start = time.perf_counter()
+        store.snapshot()
+        snapshot_seconds = time.perf_counter() - start
+
+        for i in range(tail):
+            store.create("tail{:08d}".format(i), "https://example.com/tail/{}".format(i), "tail-user", 1.0)
+        store.close()
+        del store
+
+        snapshot_size = os.path.getsize(os.path.join(directory, "snapshot"))
+        start = time.perf_counter()
+        store = LoggedInMemoryURLStore(directory, snapshot_interval=0)
+        restart_seconds = time.perf_counter() - start
+        assert len(store.records) == links + tail
+        store.close()
+
+        print("links:               {:,}".format(links))
+        print("log tail:            {:,} operations".format(tail))
+        print("snapshot size:       {:.1f} MB".format(snapshot_size / 1e6))
+        print("snapshot write:      {:.2f} s".format(snapshot_seconds))
+        print("restart (load+tail): {:.2f} s".format(restart_seconds))
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
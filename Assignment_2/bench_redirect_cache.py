@@ -0,0 +1,40 @@
+# Redirect throughput with and without the serialized-response cache (Flask test client)
+# Usage: python bench_redirect_cache.py [requests]
+import sys
+import time
+import jwt
+import url_shortener
+from authenticator import SECRET_KEY
+
+
+def run(client, headers, short_ids, requests):
+    start = time.perf_counter()
+    for i in range(requests):
+        client.get('/' + short_ids[i % len(short_ids)], headers=headers)
+    return requests / (time.perf_counter() - start)
+
+
+def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    client = url_shortener.app.test_client()
+    headers = {'Authorization': jwt.generate_jwt('bench', SECRET_KEY)}
+    short_ids = [client.post('/', json={'value': 'https://example.com/{}'.format(i)}, headers=headers).get_json()['id']
+                 for i in range(100)]
+    cache = url_shortener.redirect_cache
+
+    max_size = cache.max_size
+    cache.max_size = 0
+    cache.invalidate(short_ids)
+    without = run(client, headers, short_ids, requests)
+
+    cache.max_size = max_size
+    run(client, headers, short_ids, len(short_ids))
+    with_cache = run(client, headers, short_ids, requests)
+
+    print("without cache: {:>10,.0f} redirects/sec".format(without))
+    print("with cache:    {:>10,.0f} redirects/sec".format(with_cache))
+    print("cache stats:   {}".format(cache.stats()))
+
+
+if __name__ == '__main__':
+    main()
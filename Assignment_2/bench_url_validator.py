@@ -0,0 +1,52 @@
+# URL validation cost: the old StackOverflow regex vs url_validator, on the read_from.csv
+# URLs and on long adversarial inputs that make the regex backtrack through every alternative
+# Usage: python bench_url_validator.py [max length]
+import csv
+import re
+import sys
+import timeit
+from url_validator import is_valid_url, url_validator
+
+URL_REGEX = re.compile(
+    r'^(https?://(?:www\.|(?!www))[a-zA-Z0-9][a-zA-Z0-9-]+[a-zA-Z0-9]\.[^\s]{2,}|'
+    r'www\.[a-zA-Z0-9][a-zA-Z0-9-]+[a-zA-Z0-9]\.[^\s]{2,}|'
+    r'https?://(?:www\.|(?!www))[a-zA-Z0-9]+\.[^\s]{2,}|'
+    r'www\.[a-zA-Z0-9]+\.[^\s]{2,})$',
+    re.UNICODE
+)
+
+ADVERSARIAL = {
+    "no dot": lambda n: "http://" + "a" * n,
+    "hyphen label": lambda n: "http://" + "a-" * (n // 2) + "!",
+    "trailing space": lambda n: "http://a." + "b" * n + " ",
+    "dotted tail": lambda n: "www.a." + "b." * (n // 2) + " ",
+}
+
+
+def per_call(fn, urls, number):
+    return timeit.timeit(lambda: [fn(url) for url in urls], number=number) / (number * len(urls))
+
+
+def main():
+    max_length = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    with open('read_from.csv') as f:
+        normal = [url for row in csv.reader(f) for url in row[:3] + row[4:]]
+    cached = url_validator(cache_size=1024)
+
+    print("{:<16}{:>10}{:>14}{:>14}{:>14}".format("input", "length", "regex", "validator", "memoized"))
+    print("{:<16}{:>10}{:>12.2f}us{:>12.2f}us{:>12.2f}us".format(
+        "read_from.csv", "~50", per_call(URL_REGEX.match, normal, 2000) * 1e6,
+        per_call(is_valid_url, normal, 2000) * 1e6, per_call(cached, normal, 2000) * 1e6))
+    for name, make in ADVERSARIAL.items():
+        length = 100
+        while length <= max_length:
+            url = make(length)
+            number = max(1, 100000 // length)
+            print("{:<16}{:>10}{:>12.2f}us{:>12.2f}us{:>14}".format(
+                name, length, per_call(URL_REGEX.match, [url], number) * 1e6,
+                per_call(is_valid_url, [url], number) * 1e6, "-"))
+            length *= 10
+
+
+if __name__ == '__main__':
+    main()
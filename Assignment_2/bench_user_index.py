@@ -0,0 +1,43 @@
+# Per-user listing/deletion: full scan of all records against the username index
+# Usage: python bench_user_index.py [links] [users]
+import sys
+import time
+from storage import InMemoryURLStore
+
+
+def scan_list(store, username):
+    return [record.url for record in store.records.values() if record.owner == username]
+
+
+def scan_delete(store, username):
+    urls_to_delete = [key for key, record in store.records.items() if record.owner == username]
+    for key in urls_to_delete:
+        store.records.pop(key, None)
+    return len(urls_to_delete)
+
+
+def timed(label, fn, usernames):
+    start = time.perf_counter()
+    for username in usernames:
+        fn(username)
+    elapsed = time.perf_counter() - start
+    print("{:<22} {:>12.1f} us/call".format(label, elapsed / len(usernames) * 1e6))
+
+
+def main():
+    links = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    users = int(sys.argv[2]) if len(sys.argv) > 2 else 10000
+    store = InMemoryURLStore()
+    for i in range(links):
+        store.create("id{:010d}".format(i), "https://example.com/{}".format(i), "user{}".format(i % users), 0.0)
+    print("{:,} links across {:,} users".format(links, users))
+
+    sample = ["user{}".format(i) for i in range(0, users, max(users // 20, 1))]
+    timed("list (scan)", lambda u: scan_list(store, u), sample)
+    timed("list (index)", store.list_urls, sample)
+    timed("delete (scan)", lambda u: scan_delete(store, u), sample[:len(sample) // 2])
+    timed("delete (index)", store.delete_user, sample[len(sample) // 2:])
+
+
+if __name__ == '__main__':
+    main()
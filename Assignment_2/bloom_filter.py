@@ -0,0 +1,49 @@
+import math
+import hashlib
+import threading
+
+
+# Counting Bloom filter over short IDs: one byte counter per slot, so IDs can be removed
+# again. A "no" from might_contain() is definite; a "yes" is wrong with probability about
+# `error_rate` while at most `capacity` IDs are in the filter. Counters stick at 255 and
+# are never decremented after that, which can only cause extra false positives.
+class CountingBloomFilter:
+    def __init__(self, capacity=1000000, error_rate=0.01):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(8, int(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)))
+        self.hash_count = max(1, int(round(self.size / capacity * math.log(2))))
+        self.counters = bytearray(self.size)
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def positions(self, item):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, item):
+        positions = self.positions(item)
+        with self.lock:
+            for i in positions:
+                if self.counters[i] < 255:
+                    self.counters[i] += 1
+            self.count += 1
+
+    def remove(self, item):
+        # Only call for items that were added, or other items may become false negatives
+        positions = self.positions(item)
+        with self.lock:
+            for i in positions:
+                if 0 < self.counters[i] < 255:
+                    self.counters[i] -= 1
+            self.count -= 1
+
+    def might_contain(self, item):
+        counters = self.counters
+        return all(counters[i] for i in self.positions(item))
+
+    def stats(self):
+        return {"items": self.count, "capacity": self.capacity, "error_rate": self.error_rate,
+                "counters": self.size, "hash_count": self.hash_count, "memory_bytes": len(self.counters)}
@@ -0,0 +1,108 @@
+import atexit
+import threading
+
+
+# Write-behind click accounting. Redirects only bump a counter in one of `shards` small
+# dicts, each behind its own lock; a background thread moves the pending counts to the
+# store in one add_clicks() batch every `flush_interval` seconds, or sooner once about
+# `flush_threshold` clicks are pending. get_stats() adds the pending counts on top of the
+# stored ones, so reads stay exact.
+class ClickCounter:
+    def __init__(self, store, shards=16, flush_interval=1.0, flush_threshold=10000):
+        self.store = store
+        self.shards = shards
+        self.flush_interval = flush_interval
+        self.flush_threshold = flush_threshold
+        self.locks = [threading.Lock() for _ in range(shards)]
+        self.pending = [{} for _ in range(shards)]
+        # Only a flush trigger, so unsynchronized updates are good enough
+        self.pending_clicks = 0
+        # Held while a batch moves from the shards to the store
+        self.flush_lock = threading.Lock()
+        self.wake = threading.Event()
+        self.stop_event = threading.Event()
+
+        threading.Thread(target=self.flush_loop, daemon=True).start()
+        atexit.register(self.close)
+
+    def record(self, short_id, timestamp):
+        i = hash(short_id) % self.shards
+        with self.locks[i]:
+            entry = self.pending[i].get(short_id)
+            if entry is None:
+                self.pending[i][short_id] = [1, timestamp]
+            else:
+                entry[0] += 1
+                entry[1] = timestamp
+        self.pending_clicks += 1
+        if self.pending_clicks >= self.flush_threshold:
+            self.wake.set()
+
+    def pending_for(self, short_id):
+        i = hash(short_id) % self.shards
+        with self.locks[i]:
+            entry = self.pending[i].get(short_id)
+            return tuple(entry) if entry is not None else None
+
+    def get_stats(self, short_id):
+        with self.flush_lock:
+            stats = self.store.get_stats(short_id)
+            entry = self.pending_for(short_id)
+        if stats is not None and entry is not None:
+            stats["clicks"] += entry[0]
+            stats["last_accessed"] = entry[1]
+        return stats
+
+    def get_stats_many(self, short_ids):
+        with self.flush_lock:
+            stats = self.store.get_stats_many(short_ids)
+            pending = {short_id: self.pending_for(short_id) for short_id in stats}
+        for short_id, entry in pending.items():
+            if entry is not None:
+                stats[short_id]["clicks"] += entry[0]
+                stats[short_id]["last_accessed"] = entry[1]
+        return stats
+
+    def flush(self):
+        with self.flush_lock:
+            batch = {}
+            for i in range(self.shards):
+                with self.locks[i]:
+                    pending, self.pending[i] = self.pending[i], {}
+                batch.update(pending)
+            self.pending_clicks = 0
+            if not batch:
+                return
+            try:
+                self.store.add_clicks(batch)
+            except Exception:
+                # e.g. "database is locked": put the counts back for the next flush
+                self.restore(batch)
+                raise
+
+    def restore(self, batch):
+        # Must be called with flush_lock held. Clicks recorded since the swap are newer
+        for short_id, (count, last_accessed) in batch.items():
+            i = hash(short_id) % self.shards
+            with self.locks[i]:
+                entry = self.pending[i].get(short_id)
+                if entry is None:
+                    self.pending[i][short_id] = [count, last_accessed]
+                else:
+                    entry[0] += count
+                    entry[1] = max(entry[1], last_accessed)
+            self.pending_clicks += count
+
+    def flush_loop(self):
+        while not self.stop_event.is_set():
+            self.wake.wait(self.flush_interval)
+            self.wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Click flush failed: {e}")
+
+    def close(self):
+        self.stop_event.set()
+        self.wake.set()
+        self.flush()
@@ -0,0 +1,88 @@
+import threading
+from array import array
+
+
+# Click counts per time bucket in a fixed-size ring. `head` is the index (time // bucket_seconds)
+# of the newest bucket; slot i % size holds bucket i for the last `size` buckets. Recording is
+# O(1): moving the head forward clears at most `size` slots.
+class RingSeries:
+    __slots__ = ("bucket_seconds", "size", "head", "counts")
+
+    def __init__(self, bucket_seconds, size):
+        self.bucket_seconds = bucket_seconds
+        self.size = size
+        self.head = None
+        self.counts = array("I", bytes(4 * size))
+
+    def record(self, timestamp, count=1):
+        index = int(timestamp // self.bucket_seconds)
+        if self.head is None:
+            self.head = index
+        elif index > self.head:
+            for i in range(self.head + 1, min(index, self.head + self.size) + 1):
+                self.counts[i % self.size] = 0
+            self.head = index
+        elif index <= self.head - self.size:
+            # Too old for the ring
+            return
+        self.counts[index % self.size] += count
+
+    def query(self, start, end):
+        # [(bucket start time, clicks)] for buckets overlapping [start, end], oldest first
+        first = int(start // self.bucket_seconds)
+        last = int(end // self.bucket_seconds)
+        buckets = []
+        for index in range(max(first, last - self.size + 1), last + 1):
+            if self.head is None or index > self.head or index <= self.head - self.size:
+                clicks = 0
+            else:
+                clicks = self.counts[index % self.size]
+            buckets.append((index * self.bucket_seconds, clicks))
+        return buckets
+
+
+# (bucket length in seconds, number of buckets kept) per granularity
+GRANULARITIES = {
+    "minute": (60, 60),
+    "hour": (3600, 48),
+    "day": (86400, 90),
+}
+
+
+# Per-link minute/hour/day click series, created on a link's first click. Each link costs
+# about 800 bytes of counters however many clicks it gets. The series live in this
+# process only and are not persisted.
+class ClickHistograms:
+    def __init__(self, granularities=GRANULARITIES, shards=16):
+        self.granularities = granularities
+        self.shards = shards
+        self.locks = [threading.Lock() for _ in range(shards)]
+        self.series = [{} for _ in range(shards)]
+
+    def record(self, short_id, timestamp):
+        i = hash(short_id) % self.shards
+        with self.locks[i]:
+            link_series = self.series[i].get(short_id)
+            if link_series is None:
+                link_series = {name: RingSeries(bucket_seconds, size)
+                               for name, (bucket_seconds, size) in self.granularities.items()}
+                self.series[i][short_id] = link_series
+            for ring in link_series.values():
+                ring.record(timestamp)
+
+    def query(self, short_id, granularity, start, end):
+        if granularity not in self.granularities:
+            raise ValueError("granularity must be one of: {}".format(", ".join(self.granularities)))
+        i = hash(short_id) % self.shards
+        with self.locks[i]:
+            link_series = self.series[i].get(short_id)
+            if link_series is not None:
+                return link_series[granularity].query(start, end)
+        bucket_seconds, size = self.granularities[granularity]
+        return RingSeries(bucket_seconds, size).query(start, end)
+
+    def discard(self, short_ids):
+        for short_id in short_ids:
+            i = hash(short_id) % self.shards
+            with self.locks[i]:
+                self.series[i].pop(short_id, None)
@@ -0,0 +1,84 @@
+import threading
+from contextlib import ExitStack, contextmanager
+from urllib.parse import urlsplit, urlunsplit
+
+
+DEFAULT_PORTS = {"http": "80", "https": "443"}
+
+
+def normalize_url(url):
+    # Case-insensitive parts lowercased, default port and empty path dropped; the path,
+    # query and fragment are kept as they are
+    url = url.strip()
+    if "://" not in url:
+        # Scheme-less "www.example.com/path": only the host is case-insensitive
+        host, sep, rest = url.partition("/")
+        return host.lower() + (sep + rest if rest else "")
+    try:
+        parts = urlsplit(url)
+    except ValueError:
+        # urlsplit rejects some hosts the validator lets through, e.g. an unclosed "["
+        scheme, _, rest = url.partition("://")
+        host, sep, rest = rest.partition("/")
+        return scheme.lower() + "://" + host.lower() + (sep + rest if rest else "")
+    scheme = parts.scheme.lower()
+    netloc = parts.netloc.lower()
+    if netloc.endswith(":" + DEFAULT_PORTS.get(scheme, "")):
+        netloc = netloc.rsplit(":", 1)[0]
+    path = "" if parts.path == "/" else parts.path
+    return urlunsplit((scheme, netloc, path, parts.query, parts.fragment))
+
+
+# Per-user index from normalized long URL to the short ID already minted for it, so
+# shortening the same URL again can hand back that ID. The index is per process: callers
+# should check a hit against the store before trusting it when the store is shared.
+#
+# Creates hold lock_for(username, url) across lookup() and add(), so two concurrent
+# requests for the same URL cannot both miss. The locks are striped, so unrelated URLs
+# rarely wait on each other.
+class URLDedupIndex:
+    def __init__(self, stripes=64):
+        self.by_user = {}
+        # short_id -> (username, normalized url), to unindex on update and delete
+        self.keys = {}
+        self.lock = threading.Lock()
+        self.stripes = [threading.Lock() for _ in range(stripes)]
+
+    def lock_for(self, username, url):
+        return self.stripes[hash((username, normalize_url(url))) % len(self.stripes)]
+
+    @contextmanager
+    def lock_all(self, username, urls):
+        # Every stripe the URLs map to, taken in a fixed order so batches cannot deadlock
+        indexes = sorted({hash((username, normalize_url(url))) % len(self.stripes) for url in urls})
+        with ExitStack() as stack:
+            for i in indexes:
+                stack.enter_context(self.stripes[i])
+            yield
+
+    def lookup(self, username, url):
+        urls = self.by_user.get(username)
+        return urls.get(normalize_url(url)) if urls else None
+
+    def add(self, short_id, url, username):
+        key = normalize_url(url)
+        with self.lock:
+            # With several IDs for one URL (e.g. after an update) the first one stays
+            self.by_user.setdefault(username, {}).setdefault(key, short_id)
+            self.keys[short_id] = (username, key)
+
+    def remove(self, short_ids):
+        with self.lock:
+            for short_id in short_ids:
+                entry = self.keys.pop(short_id, None)
+                if entry is None:
+                    continue
+                username, key = entry
+                urls = self.by_user.get(username)
+                if urls and urls.get(key) == short_id:
+                    del urls[key]
+                    if not urls:
+                        del self.by_user[username]
+
+    def __len__(self):
+        return len(self.keys)
@@ -0,0 +1,99 @@
+import heapq
+import threading
+
+
+# Space-Saving heavy-hitter summary: at most `capacity` counters. A new item takes over the
+# smallest counter and inherits its count, so counts are upper bounds and every item with
+# a true count above total / capacity is kept. The min-heap is updated lazily: increments
+# only touch the dict, and stale heap entries are re-pushed when they reach the top, which
+# keeps an update at O(log capacity) amortized.
+class SpaceSaving:
+    __slots__ = ("capacity", "counts", "heap")
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.counts = {}
+        self.heap = []
+
+    def add(self, item, count=1):
+        counts = self.counts
+        if item in counts:
+            counts[item] += count
+            return
+        if len(counts) < self.capacity:
+            counts[item] = count
+            heapq.heappush(self.heap, (count, item))
+            return
+        while True:
+            smallest, victim = self.heap[0]
+            current = counts[victim]
+            if current == smallest:
+                break
+            heapq.heapreplace(self.heap, (current, victim))
+        del counts[victim]
+        counts[item] = smallest + count
+        heapq.heapreplace(self.heap, (smallest + count, item))
+
+    def clear(self):
+        self.counts.clear()
+        self.heap.clear()
+
+
+# Top-K over a sliding window of `slots` sub-windows of `slot_seconds` each. Every sub-window
+# has its own Space-Saving summary; a query adds up the live ones, so it costs
+# O(slots * capacity) no matter how many links exist.
+class SlidingTopK:
+    __slots__ = ("slot_seconds", "summaries", "stamps")
+
+    def __init__(self, slot_seconds=60, slots=10, capacity=100):
+        self.slot_seconds = slot_seconds
+        self.summaries = [SpaceSaving(capacity) for _ in range(slots)]
+        self.stamps = [None] * slots
+
+    def add(self, item, timestamp):
+        index = int(timestamp // self.slot_seconds)
+        slot = index % len(self.summaries)
+        if self.stamps[slot] != index:
+            self.summaries[slot].clear()
+            self.stamps[slot] = index
+        self.summaries[slot].add(item)
+
+    def top(self, k, timestamp):
+        newest = int(timestamp // self.slot_seconds)
+        totals = {}
+        for stamp, summary in zip(self.stamps, self.summaries):
+            if stamp is not None and newest - len(self.summaries) < stamp <= newest:
+                for item, count in summary.counts.items():
+                    totals[item] = totals.get(item, 0) + count
+        return heapq.nlargest(k, totals.items(), key=lambda pair: pair[1])
+
+
+# Hottest links over the last window, globally and per owner
+class TopLinks:
+    def __init__(self, slot_seconds=60, slots=10, capacity=100, user_capacity=20):
+        self.slot_seconds = slot_seconds
+        self.slots = slots
+        self.user_capacity = user_capacity
+        self.lock = threading.Lock()
+        self.global_top = SlidingTopK(slot_seconds, slots, capacity)
+        self.user_top = {}
+
+    def record(self, short_id, username, timestamp):
+        with self.lock:
+            self.global_top.add(short_id, timestamp)
+            user_top = self.user_top.get(username)
+            if user_top is None:
+                user_top = self.user_top[username] = SlidingTopK(self.slot_seconds, self.slots, self.user_capacity)
+            user_top.add(short_id, timestamp)
+
+    def top(self, k, timestamp, username=None):
+        # [(short_id, approximate clicks)], hottest first
+        with self.lock:
+            if username is None:
+                return self.global_top.top(k, timestamp)
+            user_top = self.user_top.get(username)
+            return user_top.top(k, timestamp) if user_top is not None else []
+
+    def discard_user(self, username):
+        with self.lock:
+            self.user_top.pop(username, None)
@@ -0,0 +1,250 @@
+import time
+import sqlite3
+import hashlib
+import threading
+import base62_codec
+
+
+# Common interface of the ID strategies the shortener can be configured with
+class IDEngine:
+    def generate_id(self):
+        raise NotImplementedError
+
+    def generate_ids(self, n):
+        return [self.generate_id() for _ in range(n)]
+
+
+# Default epoch for the millisecond layout: 2024-01-01T00:00:00Z
+SNOWFLAKE_EPOCH_MS = 1704067200000
+
+
+class Base62SnowflakeIDGenerator(IDEngine):
+    def __init__(self, machine_id, timestamp_bits=31, machine_id_bits=5, sequence_bits=5,
+                 time_unit_ms=1000, epoch_ms=0, wait_mode="spin", thread_block_size=0, lease=None):
+        self.sequence = 0
+        self.last_timestamp = -1
+        self.lock = threading.Lock()
+
+        # wait_mode: "spin" polls the clock, "sleep" sleeps until the next tick starts.
+        # thread_block_size > 0 gives every thread its own sub-range of sequence numbers,
+        # so the shared lock is only taken once per block instead of once per ID.
+        if wait_mode not in ("spin", "sleep"):
+            raise ValueError("wait_mode must be 'spin' or 'sleep'")
+        self.wait_mode = wait_mode
+        self.thread_block_size = thread_block_size
+        self.local = threading.local()
+
+        # Layout: | timestamp | machine_id | sequence |
+        # time_unit_ms is the length of one timestamp tick (1000 = seconds, 1 = milliseconds),
+        # epoch_ms is subtracted from the wall clock so the timestamp field lasts longer.
+        self.timestamp_bits = timestamp_bits
+        self.machine_id_bits = machine_id_bits
+        self.sequence_bits = sequence_bits
+        self.time_unit_ms = time_unit_ms
+        self.epoch_ms = epoch_ms
+
+        self.max_timestamp = (1 << self.timestamp_bits) - 1
+        self.max_machine_id = (1 << self.machine_id_bits) - 1
+        self.max_sequence = (1 << self.sequence_bits) - 1
+
+        self.timestamp_shift = self.machine_id_bits + self.sequence_bits
+        self.machine_id_shift = self.sequence_bits
+
+        if not 0 <= machine_id <= self.max_machine_id:
+            raise ValueError("machine_id must be between 0 and {}".format(self.max_machine_id))
+        self.machine_id = machine_id
+        # Optional MachineIDLease; machine_id then follows lease.current(), so IDs are only
+        # minted while this process holds the lease. Every reserved block remembers the
+        # machine_id it was reserved under and is encoded with that one.
+        self.lease = lease
+
+    @classmethod
+    def millisecond_layout(cls, machine_id, epoch_ms=SNOWFLAKE_EPOCH_MS, **kwargs):
+        # 41 bits of milliseconds (~69 years), 10 machine bits, 12 sequence bits
+        return cls(machine_id, timestamp_bits=41, machine_id_bits=10, sequence_bits=12,
+                   time_unit_ms=1, epoch_ms=epoch_ms, **kwargs)
+
+    def current_timestamp(self):
+        timestamp = (time.time_ns() // 1_000_000 - self.epoch_ms) // self.time_unit_ms
+        if timestamp > self.max_timestamp:
+            raise OverflowError("Timestamp does not fit in {} bits".format(self.timestamp_bits))
+        return timestamp
+
+    def wait_for_next_timestamp(self, last_timestamp):
+        timestamp = self.current_timestamp()
+        while timestamp <= last_timestamp:
+            if self.wait_mode == "sleep":
+                next_tick_ms = self.epoch_ms + (last_timestamp + 1) * self.time_unit_ms
+                time.sleep(max(next_tick_ms * 1_000_000 - time.time_ns(), 0) / 1e9)
+            timestamp = self.current_timestamp()
+        return timestamp
+
+    def reserve_block(self, count):
+        # Must be called with self.lock held.
+        # Returns (machine_id, timestamp, first_sequence, reserved) with 1 <= reserved <= count.
+        if self.lease is not None:
+            self.machine_id = self.lease.current()
+        timestamp = self.current_timestamp()
+
+        if timestamp <= self.last_timestamp:
+            # Same tick (or the clock stepped back): continue the current sequence
+            timestamp = self.last_timestamp
+            first_sequence = self.sequence + 1
+            if first_sequence > self.max_sequence:
+                timestamp = self.wait_for_next_timestamp(self.last_timestamp)
+                first_sequence = 0
+        else:
+            first_sequence = 0
+
+        reserved = min(count, self.max_sequence - first_sequence + 1)
+        self.last_timestamp = timestamp
+        self.sequence = first_sequence + reserved - 1
+        return self.machine_id, timestamp, first_sequence, reserved
+
+    def compose_id(self, machine_id, timestamp, sequence):
+        return (
+                (timestamp << self.timestamp_shift) |
+                (machine_id << self.machine_id_shift) |
+                sequence
+        )
+
+    def generate_id(self):
+        if self.thread_block_size > 0:
+            return base62_codec.encode(self.next_thread_local_id())
+
+        with self.lock:
+            machine_id, timestamp, sequence, _ = self.reserve_block(1)
+
+        return base62_codec.encode(self.compose_id(machine_id, timestamp, sequence))
+
+    def next_thread_local_id(self):
+        # Hand out the next ID from this thread's sub-range. The block is dropped once the
+        # clock has moved to a later tick, so IDs stay close to their creation time, and
+        # once the lease it was reserved under is gone or has moved to another machine_id.
+        local = self.local
+        block = getattr(local, "block", None)
+        current_machine_id = self.machine_id if self.lease is None else self.lease.machine_id
+        if (block is None or block[2] >= block[3] or block[1] < self.current_timestamp()
+                or block[0] != current_machine_id):
+            with self.lock:
+                machine_id, timestamp, first_sequence, reserved = self.reserve_block(self.thread_block_size)
+            block = [machine_id, timestamp, first_sequence, first_sequence + reserved]
+            local.block = block
+
+        sequence = block[2]
+        block[2] += 1
+        return self.compose_id(block[0], block[1], sequence)
+
+    def generate_ids(self, n):
+        # Reserve n IDs under a single lock acquisition, encode them afterwards
+        blocks = []
+        with self.lock:
+            remaining = n
+            while remaining > 0:
+                block = self.reserve_block(remaining)
+                blocks.append(block)
+                remaining -= block[3]
+
+        ids = []
+        for machine_id, timestamp, first_sequence, reserved in blocks:
+            base = self.compose_id(machine_id, timestamp, 0)
+            ids.extend(base62_codec.encode_many(base | sequence
+                                                for sequence in range(first_sequence, first_sequence + reserved)))
+        return ids
+
+    def parse_id(self, short_id):
+        # Split a short ID back into its fields; timestamp is returned in Unix seconds
+        value = base62_codec.decode(short_id)
+        if value >> (self.timestamp_bits + self.timestamp_shift):
+            raise ValueError("ID does not fit this generator's layout: {!r}".format(short_id))
+        timestamp = value >> self.timestamp_shift
+        return {
+            "timestamp": (self.epoch_ms + timestamp * self.time_unit_ms) / 1000,
+            "machine_id": (value >> self.machine_id_shift) & self.max_machine_id,
+            "sequence": value & self.max_sequence,
+        }
+
+
+# Hands out IDs from a monotonically increasing counter. Blocks of `block_size` values are
+# reserved in SQLite, so the database is written once per block and several processes can
+# share one counter. Every value goes through a keyed Feistel permutation of `bits` bits,
+# which is a bijection: codes stay unique and short (at most 7 base62 characters for 40 bits)
+# but consecutive IDs don't look consecutive. Nothing here ever waits on the clock.
+class CounterIDEngine(IDEngine):
+    def __init__(self, db_path, key, block_size=1000, bits=40, rounds=4, name="default"):
+        if bits % 2:
+            raise ValueError("bits must be even")
+        self.db_path = db_path
+        self.block_size = block_size
+        self.bits = bits
+        self.rounds = rounds
+        self.name = name
+        self.half_bits = bits // 2
+        self.half_mask = (1 << self.half_bits) - 1
+        self.max_counter = (1 << bits) - 1
+        self.lock = threading.Lock()
+        self.next_value = 0
+        self.block_end = 0
+
+        if isinstance(key, str):
+            key = key.encode()
+        # Keyed BLAKE2b state, copied for every round instead of re-keyed
+        self.round_hash = hashlib.blake2b(key=key[:64], digest_size=8, person=b"counter-ids")
+
+        conn = self.connect()
+        conn.execute("CREATE TABLE IF NOT EXISTS id_counter (name TEXT PRIMARY KEY, next_value INTEGER NOT NULL)")
+        conn.execute("INSERT OR IGNORE INTO id_counter (name, next_value) VALUES (?, 0)", (self.name,))
+        conn.close()
+
+    def connect(self):
+        return sqlite3.connect(self.db_path, timeout=10, isolation_level=None)
+
+    def reserve_counters(self, count):
+        # Returns the first value of `count` counters nobody else has been given
+        conn = self.connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            start = conn.execute("SELECT next_value FROM id_counter WHERE name = ?", (self.name,)).fetchone()[0]
+            if start + count - 1 > self.max_counter:
+                conn.execute("ROLLBACK")
+                raise OverflowError("Counter space of {} bits is exhausted".format(self.bits))
+            conn.execute("UPDATE id_counter SET next_value = ? WHERE name = ?", (start + count, self.name))
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+        return start
+
+    def round_function(self, round_index, half):
+        h = self.round_hash.copy()
+        h.update(bytes((round_index,)) + half.to_bytes(8, "big"))
+        return int.from_bytes(h.digest(), "big") & self.half_mask
+
+    def permute(self, value):
+        left, right = value >> self.half_bits, value & self.half_mask
+        for i in range(self.rounds):
+            left, right = right, left ^ self.round_function(i, right)
+        return (left << self.half_bits) | right
+
+    def unpermute(self, value):
+        left, right = value >> self.half_bits, value & self.half_mask
+        for i in reversed(range(self.rounds)):
+            left, right = right ^ self.round_function(i, left), left
+        return (left << self.half_bits) | right
+
+    def next_counters(self, n):
+        with self.lock:
+            if self.block_end - self.next_value < n:
+                # Whatever is left of the current block is skipped
+                start = self.reserve_counters(max(n, self.block_size))
+                self.next_value = start
+                self.block_end = start + max(n, self.block_size)
+            start = self.next_value
+            self.next_value += n
+        return range(start, start + n)
+
+    def generate_id(self):
+        counter = self.next_counters(1)[0]
+        return base62_codec.encode(self.permute(counter))
+
+    def generate_ids(self, n):
+        return base62_codec.encode_many(self.permute(counter) for counter in self.next_counters(n))
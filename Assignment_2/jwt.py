@@ -3,20 +3,111 @@ import hashlib
 import base64
 import json
 import time
+import threading
+from collections import OrderedDict
 from flask import request
 
+# Tokens that already passed verification: token -> (username, exp, secret_key, iat), in LRU order.
+# Only the exact token string hits, so a tampered token is always verified from scratch;
+# an entry is dropped once its exp has passed.
+class TokenCache:
+    def __init__(self, max_size=10000):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, token, secret_key):
+        with self.lock:
+            entry = self.entries.get(token)
+            if entry is None or entry[2] != secret_key:
+                return None
+            if entry[1] < time.time():
+                del self.entries[token]
+                return None
+            self.entries.move_to_end(token)
+            return entry
+
+    def put(self, token, secret_key, username, exp, iat=0):
+        if not self.max_size:
+            return
+        with self.lock:
+            self.entries[token] = (username, exp, secret_key, iat)
+            self.entries.move_to_end(token)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+token_cache = TokenCache()
+# Optional revocation.RevocationList consulted on every check; set by the service
+revocations = None
+
+# HS256 sign/verify for one secret. The keyed HMAC state and the header segment are built
+# once and copied per token, and decode() verifies and reads the claims in a single pass.
+# Tokens are byte-for-byte the ones generate_header/payload/signature produce, and only
+# tokens with that exact header verify.
+class JWTCodec:
+    def __init__(self, secret_key):
+        self.secret_key = secret_key
+        self.mac = hmac.new(secret_key.encode(), digestmod=hashlib.sha256)
+        self.header = generate_header()
+        self.prefix = self.header + "."
+
+    def sign(self, signing_input):
+        mac = self.mac.copy()
+        mac.update(signing_input.encode())
+        return base64.urlsafe_b64encode(mac.digest()).rstrip(b"=").decode()
+
+    def encode(self, username, expiration_hours=1):
+        signing_input = self.prefix + generate_payload(username, expiration_hours)
+        return signing_input + "." + self.sign(signing_input)
+
+    def decode(self, token):
+        # Returns the claims of a valid, unexpired token; raises ValueError otherwise
+        signing_input, _, signature = token.rpartition(".")
+        header, _, payload = signing_input.partition(".")
+        if not payload or "." in payload:
+            raise ValueError("Invalid JWT format")
+        if (header != self.header or not signature.isascii()
+                or not hmac.compare_digest(self.sign(signing_input), signature)):
+            raise ValueError("Invalid signature")
+        # Malformed base64 or JSON raises ValueError subclasses as well
+        claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+        try:
+            expired = claims["exp"] < time.time()
+        except (KeyError, TypeError):
+            raise ValueError("Invalid or missing exp")
+        if expired:
+            raise ValueError("Token expired")
+        return claims
+
+codecs = {}
+
+def get_codec(secret_key):
+    codec = codecs.get(secret_key)
+    if codec is None:
+        codec = codecs[secret_key] = JWTCodec(secret_key)
+    return codec
+
 # Determin whether a user has permission
 def has_permission(SECRET_KEY):
     token = request.headers.get('Authorization')
     if not token:
         print("Authorization token is required")
         return False
-    if not verify_jwt(token,SECRET_KEY):
-        print("No Permission: Invalid or expired token")
+    entry = token_cache.get(token, SECRET_KEY)
+    if entry is not None:
+        username, iat = entry[0], entry[3]
+    else:
+        try:
+            claims = get_codec(SECRET_KEY).decode(token)
+        except ValueError as e:
+            print(f"No Permission: {e}")
+            return False
+        # Tokens from before iat was added count as issued at 0
+        username, iat = claims['username'], claims.get('iat', 0)
+        token_cache.put(token, SECRET_KEY, username, claims['exp'], iat)
+    if revocations is not None and revocations.is_revoked(token, username, iat):
+        print("No Permission: Token revoked")
         return False
-    # Get username
-    _, payload, _ = parse_jwt(token)
-    username = decode_base64_urlsafe(payload)['username']
     return username
 
 def decode_base64_urlsafe(encoded_str):
@@ -36,7 +127,9 @@ def generate_header():
 def generate_payload(username,expiration_hours=1):
     payload = {
         "username":username,
-        "exp":int(time.time()) + expiration_hours * 3600
+        "exp":int(time.time()) + expiration_hours * 3600,
+        # Milliseconds, so a password change revokes earlier tokens but not the next login's
+        "iat":round(time.time(), 3)
     }
     return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
 
@@ -45,11 +138,10 @@ def generate_signature(header,payload,secret_key):
     signature = hmac.new(secret_key.encode(),message.encode() ,hashlib.sha256).digest()
     return base64.urlsafe_b64encode(signature).decode().rstrip("=")
 
+ACCESS_TOKEN_HOURS = 1
+
 def generate_jwt(username, secret_key):
-    header = generate_header()
-    payload = generate_payload(username,1)
-    signature = generate_signature(header,payload,secret_key)
-    return f"{header}.{payload}.{signature}"
+    return get_codec(secret_key).encode(username, ACCESS_TOKEN_HOURS)
 
 # Validate JWT
 def parse_jwt(token):
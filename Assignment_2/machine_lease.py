@@ -0,0 +1,139 @@
+import os
+import time
+import atexit
+import sqlite3
+import threading
+
+
+# Hands out machine IDs to worker processes through a small SQLite lease table.
+# A worker claims the lowest free ID at startup, renews its lease from a background
+# thread and deletes it on exit. Leases of crashed workers expire after `ttl` seconds.
+#
+# Generators should ask current() before minting: it re-leases when the lease was lost or
+# has lapsed, and in a process forked after acquire() (e.g. gunicorn --preload), where the
+# parent's machine_id and renew thread must not be reused.
+class MachineIDLease:
+    def __init__(self, db_path, max_machine_id, ttl=30):
+        if max_machine_id < 0:
+            raise ValueError("max_machine_id must be non-negative")
+        self.db_path = db_path
+        self.max_machine_id = max_machine_id
+        self.ttl = ttl
+        self.reset()
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self.connect()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS machine_lease ("
+            "machine_id INTEGER PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        conn.close()
+
+    def reset(self):
+        # Fresh identity with no lease, for a new instance or a forked child
+        self.pid = os.getpid()
+        self.owner = "{}:{}".format(self.pid, os.urandom(4).hex())
+        self.machine_id = None
+        # Until then nobody else can have taken our machine_id over
+        self.valid_until = 0
+        self.stop_event = threading.Event()
+        self.renew_thread = None
+        self.lock = threading.RLock()
+
+    def connect(self):
+        # Autocommit mode so BEGIN IMMEDIATE controls the transaction explicitly
+        return sqlite3.connect(self.db_path, timeout=10, isolation_level=None)
+
+    def acquire(self):
+        with self.lock:
+            if self.machine_id is not None:
+                return self.machine_id
+            return self.claim()
+
+    def claim(self):
+        conn = self.connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            now = time.time()
+            conn.execute("DELETE FROM machine_lease WHERE expires_at < ?", (now,))
+            taken = {row[0] for row in conn.execute("SELECT machine_id FROM machine_lease")}
+            free = next((i for i in range(self.max_machine_id + 1) if i not in taken), None)
+            if free is None:
+                conn.execute("ROLLBACK")
+                raise RuntimeError("No free machine_id (max_machine_id={})".format(self.max_machine_id))
+            conn.execute("INSERT INTO machine_lease (machine_id, owner, expires_at) VALUES (?, ?, ?)",
+                         (free, self.owner, now + self.ttl))
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+        self.machine_id = free
+        self.valid_until = now + self.ttl
+        self.stop_event = threading.Event()
+        self.renew_thread = threading.Thread(target=self.renew_loop, args=(self.stop_event,), daemon=True)
+        self.renew_thread.start()
+        atexit.register(self.release)
+        return free
+
+    def current(self):
+        # The machine_id this process may mint with right now; raises RuntimeError when
+        # no machine_id can be leased, so nothing is minted without a lease
+        if self.pid != os.getpid():
+            self.reset()
+        with self.lock:
+            if self.machine_id is not None and time.time() >= self.valid_until:
+                # The renew thread fell behind; other workers may claim the ID from now on
+                self.renew()
+            if self.machine_id is None:
+                return self.claim()
+            return self.machine_id
+
+    def renew(self):
+        with self.lock:
+            if self.machine_id is None:
+                return False
+            now = time.time()
+            conn = self.connect()
+            try:
+                cursor = conn.execute("UPDATE machine_lease SET expires_at = ? WHERE machine_id = ? AND owner = ?",
+                                      (now + self.ttl, self.machine_id, self.owner))
+            finally:
+                conn.close()
+            # A lapsed lease whose row is still ours was not claimed by anyone else
+            if cursor.rowcount == 0:
+                print("Lease for machine_id {} was lost".format(self.machine_id))
+                self.drop()
+                return False
+            self.valid_until = now + self.ttl
+            return True
+
+    def drop(self):
+        self.stop_event.set()
+        atexit.unregister(self.release)
+        self.machine_id = None
+
+    def renew_loop(self, stop_event):
+        while not stop_event.wait(self.ttl / 3):
+            try:
+                self.renew()
+            except sqlite3.Error as e:
+                print(f"Lease renewal failed: {e}")
+
+    def release(self):
+        with self.lock:
+            if self.machine_id is None:
+                return
+            machine_id = self.machine_id
+            self.drop()
+            try:
+                conn = self.connect()
+                try:
+                    conn.execute("DELETE FROM machine_lease WHERE machine_id = ? AND owner = ?",
+                                 (machine_id, self.owner))
+                finally:
+                    conn.close()
+            except sqlite3.Error as e:
+                # The lease simply expires after ttl seconds
+                print(f"Lease release failed: {e}")
@@ -0,0 +1,224 @@
+import os
+import json
+import mmap
+import struct
+import time
+import threading
+
+
+# Append-only operation log with group commit. Records are JSON lists, one per line.
+# Writers enqueue a record and (optionally) wait until it is on disk; a single flusher
+# thread writes everything queued since its last round with one write() and one fsync(),
+# so concurrent writers share the cost of the fsync.
+#
+# The log is split into numbered segment files (log.<n>). rotate() starts a new segment,
+# which lets a snapshot cover all earlier segments so they can be deleted.
+class OperationLog:
+    def __init__(self, directory, commit_interval=0.002, wait_for_sync=True):
+        self.directory = directory
+        self.commit_interval = commit_interval
+        self.wait_for_sync = wait_for_sync
+        os.makedirs(directory, exist_ok=True)
+
+        self.cond = threading.Condition()
+        # Held while a group is written and fsynced, so rotate() never closes the file under it
+        self.sync_lock = threading.Lock()
+        self.buffer = []
+        self.appended = 0
+        self.synced = 0
+        self.closed = False
+
+        segments = self.segments()
+        self.segment = segments[-1] + 1 if segments else 1
+        self.file = open(self.segment_path(self.segment), "ab")
+        self.flusher = threading.Thread(target=self.flush_loop, daemon=True)
+        self.flusher.start()
+
+    def segment_path(self, segment):
+        return os.path.join(self.directory, "log.{}".format(segment))
+
+    def segments(self):
+        numbers = []
+        for name in os.listdir(self.directory):
+            prefix, _, number = name.partition(".")
+            if prefix == "log" and number.isdigit():
+                numbers.append(int(number))
+        return sorted(numbers)
+
+    def append(self, record):
+        # Call in the same order the operations are applied; returns a ticket for wait()
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+        with self.cond:
+            self.buffer.append(line)
+            self.appended += 1
+            self.cond.notify_all()
+            return self.appended
+
+    def append_many(self, records):
+        # Like append() for several records; returns the ticket of the last one
+        lines = [json.dumps(record, separators=(",", ":")) + "\n" for record in records]
+        with self.cond:
+            self.buffer.extend(lines)
+            self.appended += len(lines)
+            self.cond.notify_all()
+            return self.appended
+
+    def wait(self, ticket):
+        if not self.wait_for_sync:
+            return
+        with self.cond:
+            self.cond.wait_for(lambda: self.synced >= ticket or self.closed)
+
+    def flush_loop(self):
+        while True:
+            with self.cond:
+                self.cond.wait_for(lambda: self.buffer or self.closed)
+                if self.closed and not self.buffer:
+                    return
+            # Give concurrent writers a moment to join this commit group
+            if self.commit_interval:
+                time.sleep(self.commit_interval)
+            self.flush()
+
+    def flush(self):
+        with self.sync_lock:
+            with self.cond:
+                lines, self.buffer = self.buffer, []
+                ticket = self.appended
+            if lines:
+                self.file.write("".join(lines).encode())
+                self.file.flush()
+                os.fsync(self.file.fileno())
+            with self.cond:
+                self.synced = max(self.synced, ticket)
+                self.cond.notify_all()
+
+    def rotate(self):
+        # Start a new segment; returns its number. Everything appended before the call
+        # is in earlier segments.
+        with self.sync_lock, self.cond:
+            if self.buffer:
+                self.file.write("".join(self.buffer).encode())
+                self.buffer = []
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            self.file.close()
+            self.synced = self.appended
+            self.segment += 1
+            self.file = open(self.segment_path(self.segment), "ab")
+            self.cond.notify_all()
+            return self.segment
+
+    def remove_segments_before(self, segment):
+        for number in self.segments():
+            if number < segment:
+                os.remove(self.segment_path(number))
+
+    def replay(self, from_segment=0):
+        for number in self.segments():
+            if number < from_segment:
+                continue
+            with open(self.segment_path(number), "rb") as f:
+                for line in f:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        # Torn write at the end of a segment after a crash
+                        break
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+        self.flusher.join()
+        self.flush()
+        self.file.close()
+
+
+# Snapshot file: a fixed header followed by one UTF-8 blob of records.
+# Fields are separated by \x1f and records by \x1e; \x1b escapes those bytes inside fields.
+SNAPSHOT_MAGIC = b"URLSNAP1"
+SNAPSHOT_HEADER = struct.Struct("<8sQQ")  # magic, first log segment not covered, record count
+SNAPSHOT_CHUNK_SIZE = 16 * 1024 * 1024
+FIELD_SEPARATOR = "\x1f"
+RECORD_SEPARATOR = "\x1e"
+ESCAPE = "\x1b"
+
+
+def escape_field(value):
+    if ESCAPE in value or FIELD_SEPARATOR in value or RECORD_SEPARATOR in value:
+        value = value.replace(ESCAPE, ESCAPE + "0").replace(FIELD_SEPARATOR, ESCAPE + "1")
+        value = value.replace(RECORD_SEPARATOR, ESCAPE + "2")
+    return value
+
+
+def unescape_field(value):
+    return value.replace(ESCAPE + "2", RECORD_SEPARATOR).replace(ESCAPE + "1", FIELD_SEPARATOR) \
+        .replace(ESCAPE + "0", ESCAPE)
+
+
+def write_snapshot(path, records, segment, batch_size=10000):
+    # records: iterable of (short_id, url, username, clicks, created_at, last_accessed),
+    # written out batch_size at a time. The count in the header is filled in at the end.
+    count = 0
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, segment, 0))
+        parts = []
+        for short_id, url, username, clicks, created_at, last_accessed in records:
+            parts.append(FIELD_SEPARATOR.join((
+                escape_field(short_id), escape_field(url), escape_field(username), str(clicks),
+                repr(created_at), "" if last_accessed is None else repr(last_accessed),
+            )))
+            if len(parts) == batch_size:
+                f.write(((RECORD_SEPARATOR if count else "") + RECORD_SEPARATOR.join(parts)).encode())
+                count += len(parts)
+                parts = []
+        if parts:
+            f.write(((RECORD_SEPARATOR if count else "") + RECORD_SEPARATOR.join(parts)).encode())
+            count += len(parts)
+        f.seek(0)
+        f.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, segment, count))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def load_snapshot(path, chunk_size=SNAPSHOT_CHUNK_SIZE):
+    # Returns (segment, records); (0, []) if there is no snapshot yet. records is a generator
+    # reading the memory-mapped file about chunk_size bytes at a time, so neither the whole
+    # file as text nor a list of all records is ever held in memory.
+    if not os.path.exists(path) or os.path.getsize(path) < SNAPSHOT_HEADER.size:
+        return 0, []
+    with open(path, "rb") as f:
+        magic, segment, count = SNAPSHOT_HEADER.unpack(f.read(SNAPSHOT_HEADER.size))
+    if magic != SNAPSHOT_MAGIC:
+        raise ValueError("Not a URL store snapshot: {}".format(path))
+    return segment, iter_snapshot_records(path, count, chunk_size)
+
+
+def iter_snapshot_records(path, count, chunk_size):
+    if not count:
+        return
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        separator = RECORD_SEPARATOR.encode()
+        position, end = SNAPSHOT_HEADER.size, len(mm)
+        while position <= end:
+            # Chunks end at a record separator; that byte never occurs inside a multi-byte
+            # UTF-8 character
+            cut = end
+            if position + chunk_size < end:
+                cut = mm.rfind(separator, position, position + chunk_size)
+                if cut == -1:
+                    # A single record longer than chunk_size
+                    cut = mm.find(separator, position + chunk_size)
+                    if cut == -1:
+                        cut = end
+            for record in str(mm[position:cut], "utf-8").split(RECORD_SEPARATOR):
+                fields = record.split(FIELD_SEPARATOR)
+                if ESCAPE in record:
+                    fields = [unescape_field(field) for field in fields]
+                short_id, url, username, clicks, created_at, last_accessed = fields
+                yield (short_id, url, username, int(clicks), float(created_at),
+                       float(last_accessed) if last_accessed else None)
+            position = cut + 1
@@ -0,0 +1,65 @@
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from werkzeug.security import generate_password_hash, check_password_hash
+
+
+class HasherBusy(RuntimeError):
+    pass
+
+
+# Pool workers start on the first submit(), i.e. from a request thread of an already
+# multi-threaded server, and forking such a process can deadlock the child on locks held
+# by other threads. They are forked from a clean forkserver process instead, or spawned
+# where there is none (Windows).
+START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+
+# Runs the deliberately slow password hashing in a pool of worker processes, so a burst of
+# logins neither holds the GIL nor blocks the request threads serving cheap endpoints.
+# At most `max_pending` hashes may be queued or running; past that, submit() raises
+# HasherBusy straight away so the caller can answer 503 instead of queueing without bound.
+#
+# `method` is a werkzeug method string, e.g. "scrypt:32768:8:1" or "pbkdf2:sha256:600000".
+# workers=0 hashes inline on the calling thread (no pool, but still bounded).
+class PasswordHasher:
+    def __init__(self, workers=1, max_pending=None, method="scrypt"):
+        if workers < 0:
+            raise ValueError("workers must be >= 0")
+        self.method = method
+        self.max_pending = max_pending if max_pending is not None else max(workers, 1) * 4
+        self.pending = 0
+        self.rejected = 0
+        self.lock = threading.Lock()
+        self.pool = None
+        if workers:
+            self.pool = ProcessPoolExecutor(max_workers=workers,
+                                            mp_context=multiprocessing.get_context(START_METHOD))
+
+    def submit(self, fn, *args):
+        with self.lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise HasherBusy("Password hashing queue is full")
+            self.pending += 1
+        try:
+            if self.pool is None:
+                return fn(*args)
+            return self.pool.submit(fn, *args).result()
+        finally:
+            with self.lock:
+                self.pending -= 1
+
+    def hash(self, password):
+        return self.submit(generate_password_hash, password, self.method)
+
+    def check(self, password_hash, password):
+        # The cost comes from the stored hash, so old hashes keep verifying after a method change
+        return self.submit(check_password_hash, password_hash, password)
+
+    def stats(self):
+        return {"pending": self.pending, "max_pending": self.max_pending, "rejected": self.rejected}
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
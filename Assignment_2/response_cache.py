@@ -0,0 +1,61 @@
+import time
+import threading
+from collections import OrderedDict
+
+
+# Bounded LRU of pre-serialized redirect responses: short_id -> (body, owner, expires_at).
+# Writers must call invalidate() whenever a link changes or goes away. The cache is per
+# process, so with a store shared between processes a `ttl` bounds how long another
+# worker's update can go unseen. max_size=0 disables caching.
+#
+# `epoch` counts invalidations. Read it before loading a link from the store and pass it
+# to put(): if anything was invalidated in between, the loaded value may be stale and is
+# not cached.
+class ResponseCache:
+    def __init__(self, max_size=10000, ttl=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.epoch = 0
+
+    def get(self, short_id):
+        with self.lock:
+            entry = self.entries.get(short_id)
+            if entry is not None and (entry[2] is None or entry[2] > time.monotonic()):
+                self.entries.move_to_end(short_id)
+                self.hits += 1
+                return entry[0], entry[1]
+            self.misses += 1
+            return None
+
+    def put(self, short_id, body, owner, epoch):
+        if not self.max_size:
+            return
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self.lock:
+            if epoch != self.epoch:
+                return
+            self.entries[short_id] = (body, owner, expires_at)
+            self.entries.move_to_end(short_id)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, short_ids):
+        with self.lock:
+            self.epoch += 1
+            for short_id in short_ids:
+                if self.entries.pop(short_id, None) is not None:
+                    self.invalidations += 1
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {"size": len(self.entries), "max_size": self.max_size, "hits": self.hits,
+                    "misses": self.misses, "hit_ratio": self.hits / lookups if lookups else 0.0,
+                    "evictions": self.evictions, "invalidations": self.invalidations}
@@ -0,0 +1,101 @@
+import os
+import time
+import sqlite3
+import threading
+
+
+# Access tokens revoked before their exp, shared between the authenticator (which writes)
+# and the shortener processes (which check) through an append-only SQLite table.
+#
+# A row revokes either one token (logout) or every token of a user issued at or before
+# `revoked_before` (password change). Readers keep the live rows in memory, a set of
+# tokens and a dict of per-user cutoffs, so is_revoked() is two hash lookups. A background
+# thread picks up new rows by id every `poll_interval` seconds and drops entries once every
+# token they cover has expired. poll_interval=None starts no thread (writers).
+class RevocationList:
+    def __init__(self, db_path, poll_interval=1.0):
+        self.db_path = db_path
+        self.poll_interval = poll_interval
+        # token -> exp
+        self.tokens = {}
+        # username -> (revoked_before, expires_at)
+        self.users = {}
+        self.last_id = 0
+        self.stop_event = threading.Event()
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self.connect()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS revoked_token ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, token TEXT, username TEXT, "
+            "revoked_before REAL, expires_at REAL NOT NULL)"
+        )
+        conn.close()
+        if poll_interval is not None:
+            self.poll()
+            threading.Thread(target=self.poll_loop, daemon=True).start()
+
+    def connect(self):
+        return sqlite3.connect(self.db_path, timeout=10)
+
+    def is_revoked(self, token, username, issued_at):
+        if token in self.tokens:
+            return True
+        entry = self.users.get(username)
+        return entry is not None and issued_at <= entry[0]
+
+    def insert(self, token, username, revoked_before, expires_at):
+        conn = self.connect()
+        try:
+            with conn:
+                conn.execute("INSERT INTO revoked_token (token, username, revoked_before, expires_at) "
+                             "VALUES (?, ?, ?, ?)", (token, username, revoked_before, expires_at))
+                # Expired rows no longer matter to any reader
+                conn.execute("DELETE FROM revoked_token WHERE expires_at < ?", (time.time(),))
+        finally:
+            conn.close()
+
+    def revoke_token(self, token, expires_at):
+        self.insert(token, None, None, expires_at)
+
+    def revoke_user(self, username, revoked_before, expires_at):
+        # expires_at: when the last token issued before `revoked_before` expires
+        self.insert(None, username, revoked_before, expires_at)
+
+    def poll(self):
+        # Only this thread changes the dicts; readers see each update atomically
+        now = time.time()
+        conn = self.connect()
+        try:
+            rows = conn.execute(
+                "SELECT id, token, username, revoked_before, expires_at FROM revoked_token "
+                "WHERE id > ? ORDER BY id", (self.last_id,)).fetchall()
+        finally:
+            conn.close()
+        for row_id, token, username, revoked_before, expires_at in rows:
+            self.last_id = row_id
+            if expires_at < now:
+                continue
+            if token is not None:
+                self.tokens[token] = expires_at
+            else:
+                entry = self.users.get(username)
+                if entry is None or revoked_before > entry[0]:
+                    self.users[username] = (revoked_before, max(expires_at, entry[1] if entry else 0))
+
+        for token in [token for token, expires_at in self.tokens.items() if expires_at < now]:
+            del self.tokens[token]
+        for username in [username for username, entry in self.users.items() if entry[1] < now]:
+            del self.users[username]
+
+    def poll_loop(self):
+        while not self.stop_event.wait(self.poll_interval):
+            try:
+                self.poll()
+            except sqlite3.Error as e:
+                print(f"Revocation poll failed: {e}")
+
+    def close(self):
+        self.stop_event.set()
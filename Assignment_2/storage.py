@@ -0,0 +1,545 @@
+import os
+import json
+import queue
+import bisect
+import sqlite3
+import sys
+import threading
+from contextlib import contextmanager
+from oplog import OperationLog, write_snapshot, load_snapshot
+
+
+# Interface every URL store implements. Records are returned as plain dicts:
+#   get()       -> {"url", "username"}
+#   get_stats() -> {"clicks", "created_at", "last_accessed", "username"}
+class URLStore:
+    def create(self, short_id, url, username, created_at):
+        raise NotImplementedError
+
+    def create_many(self, links):
+        # links: [(short_id, url, username, created_at)], stored in one transaction
+        raise NotImplementedError
+
+    def get(self, short_id):
+        raise NotImplementedError
+
+    def get_many(self, short_ids):
+        # {short_id: {"url", "username"}} for the IDs that exist
+        raise NotImplementedError
+
+    def iter_ids(self):
+        # Every stored short ID, e.g. to rebuild in-memory indexes at startup
+        raise NotImplementedError
+
+    def get_stats(self, short_id):
+        raise NotImplementedError
+
+    def get_stats_many(self, short_ids):
+        # {short_id: stats} for the IDs that exist
+        raise NotImplementedError
+
+    def update_url(self, short_id, url):
+        raise NotImplementedError
+
+    def update_many(self, updates):
+        # updates: [(short_id, url)], applied in one transaction; returns the updated IDs
+        raise NotImplementedError
+
+    def delete(self, short_id):
+        raise NotImplementedError
+
+    def delete_many(self, short_ids):
+        # Deletes in one transaction; returns the deleted IDs
+        raise NotImplementedError
+
+    def record_click(self, short_id, timestamp):
+        raise NotImplementedError
+
+    def add_clicks(self, clicks):
+        # clicks: {short_id: (click_count, last_accessed)}; unknown IDs are ignored
+        raise NotImplementedError
+
+    def list_urls(self, username):
+        raise NotImplementedError
+
+    def list_page(self, username, limit=None, cursor=None):
+        # Returns ([(short_id, url), ...], next_cursor) for the user's links in ID order,
+        # starting after the short ID `cursor`. next_cursor is None on the last page.
+        raise NotImplementedError
+
+    def delete_user(self, username):
+        # Returns the list of deleted short IDs
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+
+def id_sort_key(short_id):
+    # Base62 IDs have no leading zeros and the charset is in ASCII order,
+    # so (length, string) orders them by numeric value
+    return len(short_id), short_id
+
+
+# One link: URL, owner, click count and timestamps in a single slotted object.
+# Owners are interned so every link of a user shares one username string.
+class LinkRecord:
+    __slots__ = ("url", "owner", "clicks", "created_at", "last_accessed")
+
+    def __init__(self, url, owner, clicks, created_at, last_accessed):
+        self.url = url
+        self.owner = owner
+        self.clicks = clicks
+        self.created_at = created_at
+        self.last_accessed = last_accessed
+
+
+# Keeps every link as a LinkRecord in one dict keyed by short ID.
+# user_index maps username -> list of the user's short IDs sorted by id_sort_key, so per-user
+# listing and deletion cost O(user's links) instead of a scan over all links, and a page
+# can resume from a cursor with a binary search.
+class InMemoryURLStore(URLStore):
+    def __init__(self):
+        self.records = {}
+        self.user_index = {}
+        self.lock = threading.RLock()
+
+    def load_record(self, short_id, url, username, clicks, created_at, last_accessed):
+        with self.lock:
+            previous = self.records.get(short_id)
+            if previous is not None and previous.owner != username:
+                self.unindex(short_id, previous.owner)
+            owner = sys.intern(username)
+            self.records[short_id] = LinkRecord(url, owner, clicks, created_at, last_accessed)
+            short_ids = self.user_index.setdefault(owner, [])
+            if previous is None or previous.owner != username:
+                if not short_ids or id_sort_key(short_ids[-1]) < id_sort_key(short_id):
+                    short_ids.append(short_id)
+                else:
+                    bisect.insort(short_ids, short_id, key=id_sort_key)
+
+    def create(self, short_id, url, username, created_at):
+        self.load_record(short_id, url, username, 0, created_at, None)
+
+    def create_many(self, links):
+        with self.lock:
+            for short_id, url, username, created_at in links:
+                self.load_record(short_id, url, username, 0, created_at, None)
+
+    def unindex(self, short_id, username):
+        short_ids = self.user_index.get(username)
+        if short_ids is not None:
+            i = bisect.bisect_left(short_ids, id_sort_key(short_id), key=id_sort_key)
+            if i < len(short_ids) and short_ids[i] == short_id:
+                del short_ids[i]
+            if not short_ids:
+                del self.user_index[username]
+
+    def get(self, short_id):
+        record = self.records.get(short_id)
+        if record is None:
+            return None
+        return {"url": record.url, "username": record.owner}
+
+    def get_many(self, short_ids):
+        result = {}
+        for short_id in short_ids:
+            entry = self.get(short_id)
+            if entry is not None:
+                result[short_id] = entry
+        return result
+
+    def iter_ids(self):
+        with self.lock:
+            return list(self.records)
+
+    def get_stats(self, short_id):
+        record = self.records.get(short_id)
+        if record is None:
+            return None
+        return {"clicks": record.clicks, "created_at": record.created_at,
+                "last_accessed": record.last_accessed, "username": record.owner}
+
+    def get_stats_many(self, short_ids):
+        result = {}
+        for short_id in short_ids:
+            stats = self.get_stats(short_id)
+            if stats is not None:
+                result[short_id] = stats
+        return result
+
+    def update_url(self, short_id, url):
+        with self.lock:
+            record = self.records.get(short_id)
+            if record is None:
+                return False
+            record.url = url
+            return True
+
+    def update_many(self, updates):
+        with self.lock:
+            return [short_id for short_id, url in updates if InMemoryURLStore.update_url(self, short_id, url)]
+
+    def delete(self, short_id):
+        with self.lock:
+            record = self.records.pop(short_id, None)
+            if record is None:
+                return False
+            self.unindex(short_id, record.owner)
+            return True
+
+    def delete_many(self, short_ids):
+        with self.lock:
+            return [short_id for short_id in short_ids if InMemoryURLStore.delete(self, short_id)]
+
+    def record_click(self, short_id, timestamp):
+        with self.lock:
+            record = self.records.get(short_id)
+            if record is not None:
+                record.clicks += 1
+                record.last_accessed = timestamp
+
+    def add_clicks(self, clicks):
+        with self.lock:
+            records = self.records
+            for short_id, (count, last_accessed) in clicks.items():
+                record = records.get(short_id)
+                if record is not None:
+                    record.clicks += count
+                    if record.last_accessed is None or last_accessed > record.last_accessed:
+                        record.last_accessed = last_accessed
+
+    def list_urls(self, username):
+        with self.lock:
+            short_ids = list(self.user_index.get(username, ()))
+        records = self.records
+        return [records[short_id].url for short_id in short_ids if short_id in records]
+
+    def list_page(self, username, limit=None, cursor=None):
+        with self.lock:
+            short_ids = self.user_index.get(username, [])
+            start = 0
+            if cursor is not None:
+                start = bisect.bisect_right(short_ids, id_sort_key(cursor), key=id_sort_key)
+            end = len(short_ids) if limit is None else start + limit
+            page = short_ids[start:end]
+            entries = [(short_id, self.records[short_id].url) for short_id in page]
+            next_cursor = page[-1] if page and end < len(short_ids) else None
+        return entries, next_cursor
+
+    def delete_user(self, username):
+        with self.lock:
+            urls_to_delete = self.user_index.pop(username, [])
+            for key in urls_to_delete:
+                self.records.pop(key, None)
+            return urls_to_delete
+
+    def clear(self):
+        with self.lock:
+            self.records.clear()
+            self.user_index.clear()
+
+
+# In-memory store made durable by an operation log. Creates, updates and deletes are applied
+# to the dicts and appended to the log; the caller returns once the group commit holding its
+# record is fsynced. A periodic snapshot covers all log segments before it, so startup loads
+# the snapshot and replays only the log tail. Clicks are not logged, they are as durable as
+# the latest snapshot: new clicks alone are enough to trigger the next one, and close() takes
+# a final snapshot if there are clicks it does not cover yet.
+class LoggedInMemoryURLStore(InMemoryURLStore):
+    def __init__(self, directory, snapshot_interval=300, commit_interval=0.002, wait_for_sync=True):
+        super().__init__()
+        self.snapshot_path = os.path.join(directory, "snapshot")
+        self.snapshot_lock = threading.Lock()
+        self.stop_event = threading.Event()
+        # Set when clicks change after the copy for the latest snapshot was taken
+        self.clicks_dirty = False
+
+        os.makedirs(directory, exist_ok=True)
+        segment, records = load_snapshot(self.snapshot_path)
+        for record in records:
+            self.load_record(*record)
+        del records
+
+        self.log = OperationLog(directory, commit_interval=commit_interval, wait_for_sync=wait_for_sync)
+        for record in self.log.replay(segment):
+            self.apply(record)
+        self.snapshot_ticket = self.log.appended
+
+        if snapshot_interval:
+            threading.Thread(target=self.snapshot_loop, args=(snapshot_interval,), daemon=True).start()
+
+    def apply(self, record):
+        op = record[0]
+        if op == "C":
+            InMemoryURLStore.create(self, record[1], record[2], record[3], record[4])
+        elif op == "U":
+            InMemoryURLStore.update_url(self, record[1], record[2])
+        elif op == "D":
+            InMemoryURLStore.delete(self, record[1])
+        elif op == "X":
+            InMemoryURLStore.delete_user(self, record[1])
+        elif op == "Z":
+            InMemoryURLStore.clear(self)
+
+    def record_click(self, short_id, timestamp):
+        super().record_click(short_id, timestamp)
+        # After the click is applied, so a snapshot that clears the flag first still sees it
+        self.clicks_dirty = True
+
+    def add_clicks(self, clicks):
+        super().add_clicks(clicks)
+        self.clicks_dirty = True
+
+    def create(self, short_id, url, username, created_at):
+        with self.lock:
+            super().create(short_id, url, username, created_at)
+            ticket = self.log.append(["C", short_id, url, username, created_at])
+        self.log.wait(ticket)
+
+    def create_many(self, links):
+        if not links:
+            return
+        with self.lock:
+            super().create_many(links)
+            ticket = self.log.append_many([["C", short_id, url, username, created_at]
+                                           for short_id, url, username, created_at in links])
+        self.log.wait(ticket)
+
+    def update_url(self, short_id, url):
+        with self.lock:
+            updated = super().update_url(short_id, url)
+            if updated:
+                ticket = self.log.append(["U", short_id, url])
+        if updated:
+            self.log.wait(ticket)
+        return updated
+
+    def update_many(self, updates):
+        with self.lock:
+            updated = super().update_many(updates)
+            urls = dict(updates)
+            if updated:
+                ticket = self.log.append_many([["U", short_id, urls[short_id]] for short_id in updated])
+        if updated:
+            self.log.wait(ticket)
+        return updated
+
+    def delete(self, short_id):
+        with self.lock:
+            deleted = super().delete(short_id)
+            if deleted:
+                ticket = self.log.append(["D", short_id])
+        if deleted:
+            self.log.wait(ticket)
+        return deleted
+
+    def delete_many(self, short_ids):
+        with self.lock:
+            deleted = super().delete_many(short_ids)
+            if deleted:
+                ticket = self.log.append_many([["D", short_id] for short_id in deleted])
+        if deleted:
+            self.log.wait(ticket)
+        return deleted
+
+    def delete_user(self, username):
+        with self.lock:
+            deleted = super().delete_user(username)
+            if deleted:
+                ticket = self.log.append(["X", username])
+        if deleted:
+            self.log.wait(ticket)
+        return deleted
+
+    def clear(self):
+        with self.lock:
+            super().clear()
+            ticket = self.log.append(["Z"])
+        self.log.wait(ticket)
+
+    def snapshot(self):
+        with self.snapshot_lock:
+            with self.lock:
+                segment = self.log.rotate()
+                self.snapshot_ticket = self.log.appended
+                self.clicks_dirty = False
+                # A dict copy is much smaller than a list of (id, record) tuples
+                copy = self.records.copy()
+            # The copy holds exactly the links as of the rotate, but shares the record objects,
+            # so in-place URL updates and clicks made while it is written may or may not be in
+            # the snapshot. Replaying the new segments on top of it still gives the right URLs
+            # because every logged operation overwrites or removes whole entries; clicks missed
+            # here have set clicks_dirty again.
+            records = ((short_id, r.url, r.owner, r.clicks, r.created_at, r.last_accessed)
+                       for short_id, r in copy.items())
+            write_snapshot(self.snapshot_path, records, segment)
+            self.log.remove_segments_before(segment)
+
+    def snapshot_loop(self, interval):
+        while not self.stop_event.wait(interval):
+            if self.log.appended != self.snapshot_ticket or self.clicks_dirty:
+                self.snapshot()
+
+    def close(self):
+        self.stop_event.set()
+        # Logged operations are already durable; unlogged clicks need a snapshot
+        if self.clicks_dirty:
+            self.snapshot()
+        self.log.close()
+
+
+SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS urls ("
+    "short_id TEXT PRIMARY KEY, url TEXT NOT NULL, username TEXT NOT NULL, "
+    "clicks INTEGER NOT NULL DEFAULT 0, created_at REAL NOT NULL, last_accessed REAL)",
+    # Serves per-user lookups and ID-ordered pages. Left-padding with spaces (which sort
+    # before every base62 digit) gives the same order as id_sort_key.
+    "CREATE INDEX IF NOT EXISTS idx_urls_username_id ON urls (username, printf('%16s', short_id))",
+    "DROP INDEX IF EXISTS idx_urls_username",
+]
+
+# The SQL text stays constant so sqlite3's per-connection statement cache reuses the prepared statements
+SQL_INSERT = "INSERT INTO urls (short_id, url, username, clicks, created_at, last_accessed) VALUES (?, ?, ?, 0, ?, NULL)"
+SQL_GET = "SELECT url, username FROM urls WHERE short_id = ?"
+SQL_IDS = "SELECT short_id FROM urls"
+# Batch statements take the IDs as one JSON array, so the SQL text (and prepared statement)
+# is the same for every batch size
+SQL_GET_MANY = "SELECT short_id, url, username FROM urls WHERE short_id IN (SELECT value FROM json_each(?))"
+SQL_GET_STATS_MANY = ("SELECT short_id, clicks, created_at, last_accessed, username FROM urls "
+                      "WHERE short_id IN (SELECT value FROM json_each(?))")
+SQL_DELETE_MANY = "DELETE FROM urls WHERE short_id IN (SELECT value FROM json_each(?)) RETURNING short_id"
+SQL_GET_STATS = "SELECT clicks, created_at, last_accessed, username FROM urls WHERE short_id = ?"
+SQL_UPDATE_URL = "UPDATE urls SET url = ? WHERE short_id = ?"
+SQL_DELETE = "DELETE FROM urls WHERE short_id = ?"
+SQL_CLICK = "UPDATE urls SET clicks = clicks + 1, last_accessed = ? WHERE short_id = ?"
+SQL_ADD_CLICKS = ("UPDATE urls SET clicks = clicks + ?, last_accessed = max(coalesce(last_accessed, 0), ?) "
+                  "WHERE short_id = ?")
+SQL_LIST = "SELECT url FROM urls WHERE username = ? ORDER BY printf('%16s', short_id)"
+SQL_PAGE = ("SELECT short_id, url FROM urls WHERE username = ? AND printf('%16s', short_id) > printf('%16s', ?) "
+            "ORDER BY printf('%16s', short_id) LIMIT ?")
+SQL_DELETE_USER = "DELETE FROM urls WHERE username = ? RETURNING short_id"
+SQL_CLEAR = "DELETE FROM urls"
+
+
+# Persistent store in a single SQLite file running in WAL mode, so readers never block the
+# writer and several worker processes can share it. Connections are kept in a pool and
+# reused across request threads.
+class SQLiteURLStore(URLStore):
+    def __init__(self, db_path, pool_size=16):
+        self.db_path = db_path
+        self.pool = queue.LifoQueue(maxsize=pool_size)
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self.connection() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            for statement in SCHEMA:
+                conn.execute(statement)
+
+    def connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=10, check_same_thread=False, cached_statements=64)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @contextmanager
+    def connection(self):
+        # Borrow a pooled connection; commits on success, rolls back on error
+        try:
+            conn = self.pool.get_nowait()
+        except queue.Empty:
+            conn = self.connect()
+        try:
+            with conn:
+                yield conn
+        finally:
+            try:
+                self.pool.put_nowait(conn)
+            except queue.Full:
+                conn.close()
+
+    def create(self, short_id, url, username, created_at):
+        with self.connection() as conn:
+            conn.execute(SQL_INSERT, (short_id, url, username, created_at))
+
+    def create_many(self, links):
+        with self.connection() as conn:
+            conn.executemany(SQL_INSERT, links)
+
+    def get(self, short_id):
+        with self.connection() as conn:
+            row = conn.execute(SQL_GET, (short_id,)).fetchone()
+        return {"url": row[0], "username": row[1]} if row else None
+
+    def get_many(self, short_ids):
+        with self.connection() as conn:
+            rows = conn.execute(SQL_GET_MANY, (json.dumps(list(short_ids)),)).fetchall()
+        return {row[0]: {"url": row[1], "username": row[2]} for row in rows}
+
+    def iter_ids(self):
+        with self.connection() as conn:
+            for row in conn.execute(SQL_IDS):
+                yield row[0]
+
+    def get_stats(self, short_id):
+        with self.connection() as conn:
+            row = conn.execute(SQL_GET_STATS, (short_id,)).fetchone()
+        if row is None:
+            return None
+        return {"clicks": row[0], "created_at": row[1], "last_accessed": row[2], "username": row[3]}
+
+    def get_stats_many(self, short_ids):
+        with self.connection() as conn:
+            rows = conn.execute(SQL_GET_STATS_MANY, (json.dumps(list(short_ids)),)).fetchall()
+        return {row[0]: {"clicks": row[1], "created_at": row[2], "last_accessed": row[3], "username": row[4]}
+                for row in rows}
+
+    def update_url(self, short_id, url):
+        with self.connection() as conn:
+            return conn.execute(SQL_UPDATE_URL, (url, short_id)).rowcount > 0
+
+    def update_many(self, updates):
+        # One transaction; each statement's rowcount tells whether the ID still existed
+        with self.connection() as conn:
+            return [short_id for short_id, url in updates
+                    if conn.execute(SQL_UPDATE_URL, (url, short_id)).rowcount > 0]
+
+    def delete(self, short_id):
+        with self.connection() as conn:
+            return conn.execute(SQL_DELETE, (short_id,)).rowcount > 0
+
+    def delete_many(self, short_ids):
+        with self.connection() as conn:
+            return [row[0] for row in conn.execute(SQL_DELETE_MANY, (json.dumps(list(short_ids)),))]
+
+    def record_click(self, short_id, timestamp):
+        with self.connection() as conn:
+            conn.execute(SQL_CLICK, (timestamp, short_id))
+
+    def add_clicks(self, clicks):
+        # One transaction for the whole batch
+        with self.connection() as conn:
+            conn.executemany(SQL_ADD_CLICKS, ((count, last_accessed, short_id)
+                                              for short_id, (count, last_accessed) in clicks.items()))
+
+    def list_urls(self, username):
+        with self.connection() as conn:
+            return [row[0] for row in conn.execute(SQL_LIST, (username,))]
+
+    def list_page(self, username, limit=None, cursor=None):
+        with self.connection() as conn:
+            # One extra row tells whether there is a next page
+            rows = conn.execute(SQL_PAGE, (username, cursor or "", -1 if limit is None else limit + 1)).fetchall()
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            return rows, rows[-1][0]
+        return rows, None
+
+    def delete_user(self, username):
+        with self.connection() as conn:
+            return [row[0] for row in conn.execute(SQL_DELETE_USER, (username,))]
+
+    def clear(self):
+        with self.connection() as conn:
+            conn.execute(SQL_CLEAR)
@@ -0,0 +1,111 @@
+import os
+import tempfile
+
+# Point the apps at scratch databases before they are imported, so the tests never touch
+# the ones in instance/
+test_databases = tempfile.TemporaryDirectory()
+os.environ['USERS_DB_URI'] = 'sqlite:///' + os.path.join(test_databases.name, 'users.db')
+os.environ['REVOCATION_DB'] = os.path.join(test_databases.name, 'revoked.db')
+
+import unittest
+import jwt
+import authenticator
+from authenticator import app, db, User, RefreshToken, SECRET_KEY
+from password_hasher import PasswordHasher
+from revocation import RevocationList
+
+
+# Registers `username` with password "pw" for each test and removes it afterwards
+class UserTestCase(unittest.TestCase):
+    username = 'tester'
+
+    def setUp(self):
+        self.app = app.test_client()
+        self.app.post('/users', json={'username': self.username, 'password': 'pw'})
+
+    def tearDown(self):
+        with app.app_context():
+            User.query.filter_by(username=self.username).delete()
+            RefreshToken.query.filter_by(username=self.username).delete()
+            db.session.commit()
+
+
+class RefreshTokenTests(UserTestCase):
+    username = 'refresh-tester'
+
+    def login(self, password='pw'):
+        response = self.app.post('/users/login', json={'username': self.username, 'password': password})
+        self.assertEqual(response.status_code, 200)
+        return response.get_json()['refresh_token']
+
+    def refresh(self, refresh_token):
+        return self.app.post('/users/refresh', json={'refresh_token': refresh_token})
+
+    def test_refresh_mints_access_tokens(self):
+        response = self.refresh(self.login())
+        self.assertEqual(response.status_code, 200)
+        claims = jwt.get_codec(SECRET_KEY).decode(response.get_json()['token'])
+        self.assertEqual(claims['username'], self.username)
+
+    def test_forged_and_unknown_tokens_are_rejected(self):
+        refresh_token = self.login()
+        token_id, _, signature = refresh_token.partition('.')
+        for bad in [None, '', token_id, token_id + '.' + signature[::-1], 'x' + refresh_token,
+                    refresh_token + 'é', 'unknown.' + signature]:
+            self.assertEqual(self.refresh(bad).status_code, 403, bad)
+
+    def test_logout_and_password_change_revoke(self):
+        first, second = self.login(), self.login()
+        self.assertEqual(self.app.post('/users/logout', json={'refresh_token': first}).status_code, 200)
+        self.assertEqual(self.refresh(first).status_code, 403)
+        self.assertEqual(self.refresh(second).status_code, 200)
+
+        self.app.put('/users', json={'username': self.username, 'old-password': 'pw', 'new-password': 'pw2'})
+        self.assertEqual(self.refresh(second).status_code, 403)
+        self.assertEqual(self.refresh(self.login('pw2')).status_code, 200)
+
+    def test_expired_tokens_are_rejected(self):
+        refresh_token = self.login()
+        with app.app_context():
+            db.session.get(RefreshToken, refresh_token.partition('.')[0]).expires_at = 0
+            db.session.commit()
+        self.assertEqual(self.refresh(refresh_token).status_code, 403)
+
+
+class PasswordHashingLimitTests(UserTestCase):
+    username = 'hashing-tester'
+
+    def test_login_is_rejected_when_hashing_is_saturated(self):
+        previous, authenticator.hasher = authenticator.hasher, PasswordHasher(workers=0, max_pending=0)
+        try:
+            response = self.app.post('/users/login', json={'username': self.username, 'password': 'pw'})
+        finally:
+            authenticator.hasher = previous
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers['Retry-After'], '1')
+
+
+class AccessTokenRevocationTests(UserTestCase):
+    username = 'revocation-tester'
+
+    def test_logout_and_password_change_revoke_access_tokens(self):
+        reader = RevocationList(app.config['REVOCATION_DB'], poll_interval=None)
+        response = self.app.post('/users/login', json={'username': self.username, 'password': 'pw'})
+        access_token, refresh_token = response.get_json()['token'], response.get_json()['refresh_token']
+        other_token = self.app.post('/users/refresh', json={'refresh_token': refresh_token}).get_json()['token']
+        self.app.post('/users/logout', json={'refresh_token': refresh_token}, headers={'Authorization': access_token})
+        reader.poll()
+        claims = jwt.get_codec(SECRET_KEY).decode(other_token)
+        self.assertTrue(reader.is_revoked(access_token, self.username, claims['iat']))
+        self.assertFalse(reader.is_revoked(other_token, self.username, claims['iat']))
+
+        self.app.put('/users', json={'username': self.username, 'old-password': 'pw', 'new-password': 'pw2'})
+        reader.poll()
+        self.assertTrue(reader.is_revoked(other_token, self.username, claims['iat']))
+        new_token = self.app.post('/users/login', json={'username': self.username, 'password': 'pw2'}).get_json()['token']
+        new_claims = jwt.get_codec(SECRET_KEY).decode(new_token)
+        self.assertFalse(reader.is_revoked(new_token, self.username, new_claims['iat']))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,26 @@
+import unittest
+from bloom_filter import CountingBloomFilter
+
+
+class CountingBloomFilterTests(unittest.TestCase):
+    def test_no_false_negatives_and_error_rate(self):
+        bloom = CountingBloomFilter(capacity=10000, error_rate=0.01)
+        members = ["id{}".format(i) for i in range(10000)]
+        for member in members:
+            bloom.add(member)
+        self.assertTrue(all(bloom.might_contain(member) for member in members))
+        false_positives = sum(bloom.might_contain("other{}".format(i)) for i in range(10000))
+        self.assertLess(false_positives, 200)
+
+    def test_remove(self):
+        bloom = CountingBloomFilter(capacity=1000)
+        for i in range(100):
+            bloom.add("id{}".format(i))
+        bloom.remove("id7")
+        self.assertFalse(bloom.might_contain("id7"))
+        self.assertTrue(all(bloom.might_contain("id{}".format(i)) for i in range(100) if i != 7))
+        self.assertEqual(bloom.stats()["items"], 99)
+
+
+if __name__ == '__main__':
+    unittest.main()
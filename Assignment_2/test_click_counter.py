@@ -0,0 +1,71 @@
+import threading
+import unittest
+from storage import InMemoryURLStore
+from click_counter import ClickCounter
+
+
+class ClickCounterTests(unittest.TestCase):
+    def setUp(self):
+        self.store = InMemoryURLStore()
+        self.store.create("a1", "https://a.com/1", "alice", 1.0)
+        self.counter = ClickCounter(self.store, shards=4, flush_interval=3600)
+
+    def tearDown(self):
+        self.counter.stop_event.set()
+        self.counter.wake.set()
+
+    def test_reads_merge_pending_clicks(self):
+        def worker():
+            for i in range(1000):
+                self.counter.record("a1", 10.0 + i)
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(self.store.get_stats("a1")["clicks"], 0)
+        self.assertEqual(self.counter.get_stats("a1")["clicks"], 8000)
+        self.counter.flush()
+        self.assertEqual(self.store.get_stats("a1")["clicks"], 8000)
+        self.assertEqual(self.store.get_stats("a1")["last_accessed"], 1009.0)
+        self.assertEqual(self.counter.get_stats("a1")["clicks"], 8000)
+
+    def test_failed_flush_keeps_the_clicks(self):
+        class LockedStore(InMemoryURLStore):
+            fail = True
+
+            def add_clicks(self, clicks):
+                if self.fail:
+                    raise RuntimeError("database is locked")
+                super().add_clicks(clicks)
+
+        store = LockedStore()
+        store.create("a1", "https://a.com/1", "alice", 1.0)
+        counter = ClickCounter(store, shards=4, flush_interval=3600)
+        try:
+            counter.record("a1", 5.0)
+            counter.record("a1", 6.0)
+            with self.assertRaises(RuntimeError):
+                counter.flush()
+            counter.record("a1", 7.0)
+            self.assertEqual(counter.get_stats("a1")["clicks"], 3)
+
+            store.fail = False
+            counter.flush()
+            self.assertEqual(store.get_stats("a1")["clicks"], 3)
+            self.assertEqual(store.get_stats("a1")["last_accessed"], 7.0)
+        finally:
+            counter.stop_event.set()
+            counter.wake.set()
+
+    def test_flush_ignores_deleted_links(self):
+        self.counter.record("a1", 5.0)
+        self.store.delete("a1")
+        self.counter.flush()
+        self.assertIsNone(self.counter.get_stats("a1"))
+
+
+if __name__ == '__main__':
+    unittest.main()
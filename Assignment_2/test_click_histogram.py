@@ -0,0 +1,43 @@
+import unittest
+from click_histogram import RingSeries, ClickHistograms
+
+
+class RingSeriesTests(unittest.TestCase):
+    def test_buckets_and_wraparound(self):
+        ring = RingSeries(60, 5)
+        ring.record(0)
+        ring.record(30)
+        ring.record(61)
+        ring.record(250)
+        self.assertEqual(ring.query(0, 299), [(0, 2), (60, 1), (120, 0), (180, 0), (240, 1)])
+
+        # Moving on by three buckets drops the three oldest
+        ring.record(420)
+        self.assertEqual(ring.query(0, 479), [(180, 0), (240, 1), (300, 0), (360, 0), (420, 1)])
+
+        # Records older than the ring are ignored
+        ring.record(0)
+        self.assertEqual(sum(clicks for _, clicks in ring.query(0, 479)), 2)
+
+    def test_long_idle_gap(self):
+        ring = RingSeries(60, 5)
+        ring.record(0)
+        ring.record(60 * 1000)
+        self.assertEqual(ring.query(0, 60 * 1000), [(60 * 996, 0), (60 * 997, 0), (60 * 998, 0),
+                                                    (60 * 999, 0), (60 * 1000, 1)])
+
+
+class ClickHistogramsTests(unittest.TestCase):
+    def test_query_and_discard(self):
+        histograms = ClickHistograms()
+        for t in (10, 20, 3700):
+            histograms.record("a1", t)
+        self.assertEqual(histograms.query("a1", "hour", 0, 3700), [(0, 2), (3600, 1)])
+        with self.assertRaises(ValueError):
+            histograms.query("a1", "week", 0, 3700)
+        histograms.discard(["a1"])
+        self.assertEqual(histograms.query("a1", "hour", 0, 3700), [(0, 0), (3600, 0)])
+
+
+if __name__ == '__main__':
+    unittest.main()
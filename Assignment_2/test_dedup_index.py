@@ -0,0 +1,46 @@
+import unittest
+from dedup_index import URLDedupIndex, normalize_url
+
+
+class NormalizeURLTests(unittest.TestCase):
+    def test_normalization(self):
+        self.assertEqual(normalize_url("HTTPS://WWW.UvA.nl:443/"), "https://www.uva.nl")
+        self.assertEqual(normalize_url("http://example.com:8080/A?b=C#D"), "http://example.com:8080/A?b=C#D")
+        self.assertEqual(normalize_url(" WWW.UVA.NL/Path "), "www.uva.nl/Path")
+        self.assertEqual(normalize_url("HTTPS://AB.c[D/"), "https://ab.c[d")
+        self.assertNotEqual(normalize_url("https://uva.nl/a"), normalize_url("https://uva.nl/A"))
+
+
+class URLDedupIndexTests(unittest.TestCase):
+    def test_lookup_is_per_user(self):
+        index = URLDedupIndex()
+        index.add("a1", "https://www.uva.nl/", "alice")
+        self.assertEqual(index.lookup("alice", "HTTPS://www.uva.nl"), "a1")
+        self.assertIsNone(index.lookup("bob", "https://www.uva.nl"))
+
+    def test_update_and_remove(self):
+        index = URLDedupIndex()
+        index.add("a1", "https://a.com", "alice")
+        index.add("a2", "https://b.com", "alice")
+        # a2 is moved to a URL that a1 already has: a1 stays the indexed ID
+        index.remove(["a2"])
+        index.add("a2", "https://a.com", "alice")
+        self.assertIsNone(index.lookup("alice", "https://b.com"))
+        self.assertEqual(index.lookup("alice", "https://a.com"), "a1")
+        # Removing the non-indexed duplicate leaves the mapping alone
+        index.remove(["a2"])
+        self.assertEqual(index.lookup("alice", "https://a.com"), "a1")
+        index.remove(["a1", "missing"])
+        self.assertIsNone(index.lookup("alice", "https://a.com"))
+        self.assertEqual(len(index), 0)
+
+    def test_lock_all(self):
+        index = URLDedupIndex(stripes=4)
+        with index.lock_all("alice", ["https://a.com", "https://b.com", "https://a.com"]):
+            pass
+        with index.lock_for("alice", "https://a.com"):
+            pass
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import random
+import unittest
+from collections import Counter
+from heavy_hitters import SpaceSaving, SlidingTopK, TopLinks
+
+
+class SpaceSavingTests(unittest.TestCase):
+    def test_finds_heavy_hitters(self):
+        rng = random.Random(7)
+        stream = ["hot{}".format(i) for i in range(5) for _ in range(1000 * (i + 1))]
+        stream += ["cold{}".format(rng.randrange(100000)) for _ in range(20000)]
+        rng.shuffle(stream)
+
+        summary = SpaceSaving(50)
+        for item in stream:
+            summary.add(item)
+        self.assertEqual(len(summary.counts), 50)
+        self.assertEqual(len(summary.heap), 50)
+
+        exact = Counter(stream)
+        top = sorted(summary.counts, key=summary.counts.get, reverse=True)[:5]
+        self.assertEqual(top, ["hot4", "hot3", "hot2", "hot1", "hot0"])
+        for item in top:
+            self.assertGreaterEqual(summary.counts[item], exact[item])
+
+
+class SlidingTopKTests(unittest.TestCase):
+    def test_window_expires(self):
+        top = SlidingTopK(slot_seconds=60, slots=3, capacity=10)
+        for _ in range(5):
+            top.add("old", 0)
+        top.add("new", 150)
+        top.add("new", 170)
+        self.assertEqual(top.top(2, 170), [("old", 5), ("new", 2)])
+        self.assertEqual(top.top(2, 200), [("new", 2)])
+
+    def test_per_user(self):
+        links = TopLinks()
+        links.record("a1", "alice", 10)
+        links.record("a1", "alice", 11)
+        links.record("b1", "bob", 12)
+        self.assertEqual(links.top(5, 20, "alice"), [("a1", 2)])
+        self.assertEqual(links.top(5, 20), [("a1", 2), ("b1", 1)])
+        links.discard_user("alice")
+        self.assertEqual(links.top(5, 20, "alice"), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
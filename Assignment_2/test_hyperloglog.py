@@ -0,0 +1,37 @@
+import unittest
+from hyperloglog import HyperLogLog, UniqueVisitors
+
+
+class HyperLogLogTests(unittest.TestCase):
+    def test_estimate_within_error(self):
+        for n in (0, 50, 5000, 50000):
+            sketch = HyperLogLog()
+            for i in range(n):
+                sketch.add("visitor-{}".format(i))
+                sketch.add("visitor-{}".format(i))
+            self.assertLessEqual(abs(sketch.count() - n), max(2, 0.07 * n))
+
+    def test_merge_equals_union(self):
+        first, second = HyperLogLog(), HyperLogLog()
+        for i in range(3000):
+            first.add(str(i))
+        for i in range(2000, 6000):
+            second.add(str(i))
+        first.merge(second)
+        self.assertLessEqual(abs(first.count() - 6000), 0.07 * 6000)
+        with self.assertRaises(ValueError):
+            first.merge(HyperLogLog(p=10))
+
+    def test_unique_visitors(self):
+        visitors = UniqueVisitors()
+        for i in range(100):
+            visitors.record("a1", "10.0.0.{}".format(i % 10))
+            visitors.record("a2", "10.0.0.{}".format(i % 20))
+        self.assertEqual(visitors.estimate("a1"), 10)
+        self.assertEqual(visitors.estimate_total(["a1", "a2"]), 20)
+        visitors.discard(["a1"])
+        self.assertEqual(visitors.estimate("a1"), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+import os
+import tempfile
+import unittest
+import threading
+import time
+import base62_codec
+from id_engines import Base62SnowflakeIDGenerator, CounterIDEngine
+
+
+class IDGeneratorTests(unittest.TestCase):
+    def test_generate_ids_unique_and_ordered(self):
+        generator = Base62SnowflakeIDGenerator.millisecond_layout(machine_id=1)
+        ids = generator.generate_ids(10000)
+        ids.append(generator.generate_id())
+        decoded = [base62_codec.decode(short_id) for short_id in ids]
+        self.assertEqual(len(set(decoded)), len(decoded))
+        self.assertEqual(decoded, sorted(decoded))
+
+    def test_generate_ids_spans_ticks(self):
+        # 5 sequence bits: 70 IDs need at least three ticks
+        generator = Base62SnowflakeIDGenerator(machine_id=1, timestamp_bits=41, time_unit_ms=1)
+        ids = generator.generate_ids(70)
+        self.assertEqual(len(set(ids)), 70)
+
+    def test_sleep_mode_waits_for_next_tick(self):
+        generator = Base62SnowflakeIDGenerator(machine_id=1, timestamp_bits=41, time_unit_ms=1,
+                                               wait_mode="sleep")
+        ids = [generator.generate_id() for _ in range(100)]
+        self.assertEqual(len(set(ids)), 100)
+
+    def test_per_thread_blocks_unique(self):
+        generator = Base62SnowflakeIDGenerator.millisecond_layout(machine_id=1, thread_block_size=16)
+        results = [[] for _ in range(8)]
+
+        def worker(index):
+            results[index].extend(generator.generate_id() for _ in range(2000))
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        ids = [short_id for result in results for short_id in result]
+        self.assertEqual(len(set(ids)), len(ids))
+
+    def test_parse_id(self):
+        generator = Base62SnowflakeIDGenerator.millisecond_layout(machine_id=7)
+        before = time.time()
+        short_ids = generator.generate_ids(3)
+        parsed = [generator.parse_id(short_id) for short_id in short_ids]
+        self.assertEqual([p["machine_id"] for p in parsed], [7, 7, 7])
+        self.assertEqual(len({p["sequence"] for p in parsed}), 3)
+        self.assertAlmostEqual(parsed[0]["timestamp"], before, delta=1)
+
+    def test_codec_matches_pybase62(self):
+        import base62
+        numbers = list(range(5000)) + [(1 << 63) - 1, 62 ** 10, 62 ** 11 - 1]
+        encoded = base62_codec.encode_many(numbers)
+        self.assertEqual(encoded, [base62.encode(n) for n in numbers])
+        self.assertEqual(base62_codec.decode_many(encoded), numbers)
+        with self.assertRaises(ValueError):
+            base62_codec.decode("not-base62")
+
+    def test_machine_id_out_of_range(self):
+        with self.assertRaises(ValueError):
+            Base62SnowflakeIDGenerator(machine_id=32)
+
+
+class CounterEngineTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmpdir.name, 'ids.db')
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_permutation_is_bijective(self):
+        engine = CounterIDEngine(self.db_path, key="secret", bits=12)
+        permuted = [engine.permute(i) for i in range(1 << 12)]
+        self.assertEqual(sorted(permuted), list(range(1 << 12)))
+        self.assertEqual([engine.unpermute(p) for p in permuted], list(range(1 << 12)))
+
+    def test_engines_share_counter(self):
+        first = CounterIDEngine(self.db_path, key="secret", block_size=10)
+        second = CounterIDEngine(self.db_path, key="secret", block_size=10)
+        ids = first.generate_ids(25) + [second.generate_id() for _ in range(25)] + [first.generate_id()]
+        self.assertEqual(len(set(ids)), len(ids))
+        self.assertTrue(all(len(short_id) <= 7 for short_id in ids))
+
+    def test_counter_exhausted(self):
+        engine = CounterIDEngine(self.db_path, key="secret", bits=4, block_size=10)
+        engine.generate_ids(16)
+        with self.assertRaises(OverflowError):
+            engine.generate_id()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+import time
+import unittest
+from flask import Flask
+import jwt
+
+SECRET = "test-secret"
+app = Flask(__name__)
+
+
+def check(token, secret=SECRET):
+    with app.test_request_context(headers={'Authorization': token}):
+        return jwt.has_permission(secret)
+
+
+class TokenCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.previous, jwt.token_cache = jwt.token_cache, jwt.TokenCache(max_size=2)
+
+    def tearDown(self):
+        jwt.token_cache = self.previous
+
+    def test_repeat_requests_hit_the_cache(self):
+        token = jwt.generate_jwt('alice', SECRET)
+        self.assertEqual(check(token), 'alice')
+        self.assertIn(token, jwt.token_cache.entries)
+        self.assertEqual(check(token), 'alice')
+        # Cached under another secret does not count
+        self.assertFalse(check(token, 'other-secret'))
+
+    def test_tampered_and_expired_tokens_are_rejected(self):
+        token = jwt.generate_jwt('alice', SECRET)
+        self.assertEqual(check(token), 'alice')
+        header, payload, signature = jwt.parse_jwt(token)
+        forged = jwt.generate_payload('mallory')
+        self.assertFalse(check(f"{header}.{forged}.{signature}"))
+        self.assertFalse(check(token[:-2] + ('AA' if not token.endswith('AA') else 'BB')))
+
+        expired = jwt.generate_payload('alice', -1)
+        self.assertFalse(check(f"{header}.{expired}.{jwt.generate_signature(header, expired, SECRET)}"))
+        self.assertEqual(len(jwt.token_cache.entries), 1)
+
+    def test_expiry_and_lru_eviction(self):
+        cache = jwt.token_cache
+        cache.put('t1', SECRET, 'alice', time.time() - 1)
+        self.assertIsNone(cache.get('t1', SECRET))
+        self.assertNotIn('t1', cache.entries)
+
+        cache.put('t1', SECRET, 'alice', time.time() + 60)
+        cache.put('t2', SECRET, 'bob', time.time() + 60)
+        cache.get('t1', SECRET)
+        cache.put('t3', SECRET, 'carol', time.time() + 60)
+        self.assertEqual(list(cache.entries), ['t1', 't3'])
+
+
+class RevocationCheckTests(unittest.TestCase):
+    class Revocations:
+        def __init__(self):
+            self.revoked = set()
+
+        def is_revoked(self, token, username, iat):
+            return token in self.revoked
+
+    def setUp(self):
+        self.previous_cache, jwt.token_cache = jwt.token_cache, jwt.TokenCache(max_size=2)
+        self.previous, jwt.revocations = jwt.revocations, self.Revocations()
+
+    def tearDown(self):
+        jwt.token_cache = self.previous_cache
+        jwt.revocations = self.previous
+
+    def test_revoked_tokens_are_rejected(self):
+        token = jwt.generate_jwt('alice', SECRET)
+        self.assertEqual(check(token), 'alice')
+        jwt.revocations.revoked.add(token)
+        # Also when the token is already cached
+        self.assertIn(token, jwt.token_cache.entries)
+        self.assertFalse(check(token))
+
+
+class JWTCodecTests(unittest.TestCase):
+    def test_matches_the_legacy_functions(self):
+        codec = jwt.JWTCodec(SECRET)
+        token = codec.encode('alice')
+        header, payload, signature = jwt.parse_jwt(token)
+        self.assertEqual(header, jwt.generate_header())
+        self.assertEqual(signature, jwt.generate_signature(header, payload, SECRET))
+        self.assertTrue(jwt.verify_jwt(token, SECRET))
+        self.assertEqual(codec.decode(token)['username'], 'alice')
+        self.assertIs(jwt.get_codec(SECRET), jwt.get_codec(SECRET))
+
+    def test_decode_rejects_bad_tokens(self):
+        codec = jwt.JWTCodec(SECRET)
+        header, payload, signature = jwt.parse_jwt(codec.encode('alice'))
+        expired = jwt.generate_payload('alice', -1)
+        no_exp = jwt.base64.urlsafe_b64encode(b'{"username": "alice"}').decode().rstrip('=')
+        for token in ['', 'a.b', f"{header}.{payload}.{signature}.x", f"{header}.{payload}.{signature}é",
+                      f"{header}.{payload}x.{signature}", jwt.JWTCodec('other').encode('alice'),
+                      f"{header}.{expired}.{codec.sign(header + '.' + expired)}",
+                      f"{header}.{no_exp}.{codec.sign(header + '.' + no_exp)}",
+                      f"{header}.e30.{codec.sign(header + '.e30')}", f"{header}.!!!.{codec.sign(header + '.!!!')}"]:
+            with self.assertRaises(ValueError, msg=token):
+                codec.decode(token)
+
+
+if __name__ == '__main__':
+    unittest.main()
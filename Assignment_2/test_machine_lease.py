@@ -0,0 +1,108 @@
+import os
+import time
+import tempfile
+import unittest
+from machine_lease import MachineIDLease
+from id_engines import Base62SnowflakeIDGenerator
+
+
+class MachineLeaseTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmpdir.name, 'leases.db')
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_distinct_ids_and_release(self):
+        first = MachineIDLease(self.db_path, max_machine_id=1)
+        second = MachineIDLease(self.db_path, max_machine_id=1)
+        self.assertEqual({first.acquire(), second.acquire()}, {0, 1})
+
+        third = MachineIDLease(self.db_path, max_machine_id=1)
+        with self.assertRaises(RuntimeError):
+            third.acquire()
+
+        first.release()
+        self.assertEqual(third.acquire(), 0)
+        second.release()
+        third.release()
+
+    def test_expired_lease_is_reclaimed(self):
+        stale = MachineIDLease(self.db_path, max_machine_id=0, ttl=0.05)
+        stale.acquire()
+        stale.stop_event.set()
+        time.sleep(0.1)
+        fresh = MachineIDLease(self.db_path, max_machine_id=0)
+        self.assertEqual(fresh.acquire(), 0)
+        self.assertFalse(stale.renew())
+        fresh.release()
+        stale.release()
+
+    def test_generator_releases_a_lost_lease(self):
+        lease = MachineIDLease(self.db_path, max_machine_id=1, ttl=0.05)
+        generator = Base62SnowflakeIDGenerator.millisecond_layout(machine_id=lease.acquire(), lease=lease)
+        self.assertEqual(generator.parse_id(generator.generate_id())["machine_id"], 0)
+
+        # Renewals stop, the lease expires and another worker takes machine_id 0 over
+        lease.stop_event.set()
+        time.sleep(0.1)
+        other = MachineIDLease(self.db_path, max_machine_id=1)
+        self.assertEqual(other.acquire(), 0)
+        self.assertEqual(generator.parse_id(generator.generate_id())["machine_id"], 1)
+
+        # With nothing left to lease, no IDs are minted
+        lease.stop_event.set()
+        time.sleep(0.1)
+        third = MachineIDLease(self.db_path, max_machine_id=1)
+        self.assertEqual(third.acquire(), 1)
+        with self.assertRaises(RuntimeError):
+            generator.generate_ids(3)
+        other.release()
+        third.release()
+        lease.release()
+
+    def test_forked_process_leases_its_own_id(self):
+        lease = MachineIDLease(self.db_path, max_machine_id=1)
+        self.assertEqual(lease.acquire(), 0)
+        # What a worker forked after acquire() sees
+        lease.pid = -1
+        self.assertEqual(lease.current(), 1)
+        self.assertEqual(lease.current(), 1)
+        lease.release()
+
+    def test_ids_keep_the_machine_id_they_were_reserved_under(self):
+        class MovableLease:
+            machine_id = 0
+
+            def current(self):
+                return self.machine_id
+
+        lease = MovableLease()
+        generator = Base62SnowflakeIDGenerator.millisecond_layout(machine_id=0, lease=lease)
+        reserve_block = generator.reserve_block
+
+        def reserve_then_move(count):
+            block = reserve_block(count)
+            # Another thread re-leases a different machine_id before this one encodes
+            lease.machine_id += 1
+            reserve_block(1)
+            return block
+
+        generator.reserve_block = reserve_then_move
+        self.assertEqual(generator.parse_id(generator.generate_id())["machine_id"], 0)
+        self.assertEqual([generator.parse_id(short_id)["machine_id"] for short_id in generator.generate_ids(2)],
+                         [1, 1])
+
+        # A thread's block is not used after the lease has moved on
+        lease.machine_id = 5
+        generator = Base62SnowflakeIDGenerator.millisecond_layout(machine_id=0, lease=lease, thread_block_size=4)
+        generator.current_timestamp = lambda: 1000
+        self.assertEqual(generator.parse_id(generator.generate_id())["sequence"], 0)
+        lease.machine_id = 6
+        moved = generator.parse_id(generator.generate_id())
+        self.assertEqual((moved["machine_id"], moved["sequence"]), (6, 4))
+
+
+if __name__ == '__main__':
+    unittest.main()
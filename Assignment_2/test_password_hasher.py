@@ -0,0 +1,43 @@
+import threading
+import unittest
+from password_hasher import PasswordHasher, HasherBusy
+
+FAST = "pbkdf2:sha256:1000"
+
+
+class PasswordHasherTests(unittest.TestCase):
+    def test_hash_and_check(self):
+        for workers in (0, 1):
+            hasher = PasswordHasher(workers=workers, method=FAST)
+            try:
+                password_hash = hasher.hash("secret")
+                self.assertTrue(password_hash.startswith("pbkdf2:sha256:1000$"))
+                self.assertTrue(hasher.check(password_hash, "secret"))
+                self.assertFalse(hasher.check(password_hash, "wrong"))
+            finally:
+                hasher.close()
+
+    def test_rejects_when_queue_is_full(self):
+        hasher = PasswordHasher(workers=0, max_pending=1)
+        started, release = threading.Event(), threading.Event()
+
+        def slow():
+            started.set()
+            release.wait()
+        thread = threading.Thread(target=hasher.submit, args=(slow,))
+        thread.start()
+        started.wait()
+        with self.assertRaises(HasherBusy):
+            hasher.hash("secret")
+        release.set()
+        thread.join()
+        self.assertEqual(hasher.stats(), {"pending": 0, "max_pending": 1, "rejected": 1})
+        self.assertTrue(hasher.check(PasswordHasher(workers=0, method=FAST).hash("x"), "x"))
+
+    def test_invalid_workers(self):
+        with self.assertRaises(ValueError):
+            PasswordHasher(workers=-1)
+
+
+if __name__ == '__main__':
+    unittest.main()
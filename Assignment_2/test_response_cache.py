@@ -0,0 +1,40 @@
+import time
+import unittest
+from response_cache import ResponseCache
+
+
+class ResponseCacheTests(unittest.TestCase):
+    def test_lru_eviction_and_counters(self):
+        cache = ResponseCache(max_size=2)
+        cache.put("a", b"A", "alice", cache.epoch)
+        cache.put("b", b"B", "alice", cache.epoch)
+        self.assertEqual(cache.get("a"), (b"A", "alice"))
+        cache.put("c", b"C", "bob", cache.epoch)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), (b"C", "bob"))
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["evictions"]), (2, 1, 1))
+
+    def test_invalidation_and_stale_put(self):
+        cache = ResponseCache()
+        cache.put("a", b"A", "alice", cache.epoch)
+        epoch = cache.epoch
+        cache.invalidate(["a"])
+        self.assertIsNone(cache.get("a"))
+        # Loaded before the invalidation, so it must not be cached
+        cache.put("a", b"old", "alice", epoch)
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.stats()["invalidations"], 1)
+
+    def test_ttl_and_disabled(self):
+        cache = ResponseCache(ttl=0.01)
+        cache.put("a", b"A", "alice", cache.epoch)
+        time.sleep(0.02)
+        self.assertIsNone(cache.get("a"))
+        disabled = ResponseCache(max_size=0)
+        disabled.put("a", b"A", "alice", disabled.epoch)
+        self.assertIsNone(disabled.get("a"))
+
+
+if __name__ == '__main__':
+    unittest.main()
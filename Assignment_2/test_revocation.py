@@ -0,0 +1,61 @@
+import os
+import time
+import tempfile
+import unittest
+from revocation import RevocationList
+
+
+class RevocationListTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmpdir.name, 'revoked.db')
+        self.writer = RevocationList(self.db_path, poll_interval=None)
+        self.reader = RevocationList(self.db_path, poll_interval=None)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_token_revocation_is_picked_up_incrementally(self):
+        now = time.time()
+        self.writer.revoke_token('t1', now + 60)
+        self.assertFalse(self.reader.is_revoked('t1', 'alice', now))
+        self.reader.poll()
+        self.assertTrue(self.reader.is_revoked('t1', 'alice', now))
+        self.assertFalse(self.reader.is_revoked('t2', 'alice', now))
+
+        last_id = self.reader.last_id
+        self.writer.revoke_token('t2', now + 60)
+        self.reader.poll()
+        self.assertEqual(self.reader.last_id, last_id + 1)
+        self.assertTrue(self.reader.is_revoked('t2', 'alice', now))
+
+    def test_user_cutoff(self):
+        now = time.time()
+        self.writer.revoke_user('alice', now, now + 60)
+        self.reader.poll()
+        self.assertTrue(self.reader.is_revoked('any', 'alice', now - 1))
+        self.assertTrue(self.reader.is_revoked('any', 'alice', now))
+        self.assertFalse(self.reader.is_revoked('any', 'alice', now + 0.001))
+        self.assertFalse(self.reader.is_revoked('any', 'bob', now - 1))
+
+        # A later cutoff replaces the earlier one
+        self.writer.revoke_user('alice', now + 10, now + 70)
+        self.reader.poll()
+        self.assertTrue(self.reader.is_revoked('any', 'alice', now + 5))
+
+    def test_expired_entries_are_pruned(self):
+        now = time.time()
+        self.writer.revoke_token('old', now - 1)
+        self.writer.revoke_token('soon', now + 0.05)
+        self.writer.revoke_user('alice', now, now + 0.05)
+        self.reader.poll()
+        self.assertEqual(set(self.reader.tokens), {'soon'})
+        time.sleep(0.1)
+        self.reader.poll()
+        self.assertEqual((self.reader.tokens, self.reader.users), ({}, {}))
+        # A new reader starts from what is still live
+        self.assertEqual(RevocationList(self.db_path, poll_interval=None).tokens, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,205 @@
+import os
+import time
+import tempfile
+import unittest
+from storage import InMemoryURLStore, LoggedInMemoryURLStore, SQLiteURLStore
+from oplog import write_snapshot, load_snapshot
+
+
+class StoreContract:
+    def make_store(self):
+        raise NotImplementedError
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.store = self.make_store()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_crud(self):
+        store = self.store
+        store.create("a1", "https://example.com", "alice", 100.0)
+        self.assertEqual(store.get("a1"), {"url": "https://example.com", "username": "alice"})
+        self.assertIsNone(store.get("missing"))
+        self.assertEqual(list(store.iter_ids()), ["a1"])
+
+        self.assertTrue(store.update_url("a1", "https://example.org"))
+        self.assertFalse(store.update_url("missing", "https://example.org"))
+        self.assertEqual(store.get("a1")["url"], "https://example.org")
+
+        store.record_click("a1", 200.0)
+        store.record_click("a1", 300.0)
+        self.assertEqual(store.get_stats("a1"),
+                         {"clicks": 2, "created_at": 100.0, "last_accessed": 300.0, "username": "alice"})
+
+        self.assertTrue(store.delete("a1"))
+        self.assertFalse(store.delete("a1"))
+        self.assertIsNone(store.get_stats("a1"))
+
+    def test_create_many(self):
+        store = self.store
+        store.create_many([("a1", "https://a.com/1", "alice", 1.0), ("a2", "https://a.com/2", "alice", 2.0)])
+        self.assertEqual(store.list_urls("alice"), ["https://a.com/1", "https://a.com/2"])
+        self.assertEqual(store.get_stats("a2")["created_at"], 2.0)
+
+    def test_batch_operations(self):
+        store = self.store
+        store.create_many([("a1", "https://a.com/1", "alice", 1.0), ("a2", "https://a.com/2", "alice", 2.0)])
+        self.assertEqual(store.get_many(["a1", "missing", "a2"]),
+                         {"a1": {"url": "https://a.com/1", "username": "alice"},
+                          "a2": {"url": "https://a.com/2", "username": "alice"}})
+        self.assertEqual(set(store.get_stats_many(["a1", "missing"])), {"a1"})
+        self.assertEqual(store.update_many([("a1", "https://a.com/new"), ("missing", "https://x.com")]), ["a1"])
+        self.assertEqual(store.get("a1")["url"], "https://a.com/new")
+        self.assertEqual(sorted(store.delete_many(["a1", "a2", "missing"])), ["a1", "a2"])
+        self.assertEqual(store.list_urls("alice"), [])
+
+    def test_add_clicks(self):
+        store = self.store
+        store.create("a1", "https://example.com", "alice", 100.0)
+        store.add_clicks({"a1": (3, 150.0), "missing": (1, 150.0)})
+        store.add_clicks({"a1": (2, 120.0)})
+        stats = store.get_stats("a1")
+        self.assertEqual((stats["clicks"], stats["last_accessed"]), (5, 150.0))
+
+    def test_per_user(self):
+        store = self.store
+        store.create("a1", "https://a.com/1", "alice", 1.0)
+        store.create("b1", "https://b.com/1", "bob", 2.0)
+        store.create("a2", "https://a.com/2", "alice", 3.0)
+        self.assertEqual(store.list_urls("alice"), ["https://a.com/1", "https://a.com/2"])
+        self.assertEqual(sorted(store.delete_user("alice")), ["a1", "a2"])
+        self.assertEqual(store.list_urls("alice"), [])
+        self.assertEqual(store.list_urls("bob"), ["https://b.com/1"])
+
+    def test_list_page(self):
+        store = self.store
+        short_ids = ["Z", "a", "10", "1A", "zz", "100"]
+        for i, short_id in enumerate(short_ids):
+            store.create(short_id, "https://a.com/{}".format(i), "alice", float(i))
+        store.create("B", "https://b.com/1", "bob", 9.0)
+
+        ordered = ["Z", "a", "10", "1A", "zz", "100"]
+        seen = []
+        cursor = None
+        while True:
+            entries, cursor = store.list_page("alice", 4, cursor)
+            seen.extend(short_id for short_id, _ in entries)
+            if cursor is None:
+                break
+        self.assertEqual(seen, ordered)
+
+        entries, cursor = store.list_page("alice")
+        self.assertEqual([short_id for short_id, _ in entries], ordered)
+        self.assertIsNone(cursor)
+        self.assertEqual(store.list_page("alice", 10, "zz")[0], [("100", "https://a.com/5")])
+
+
+class InMemoryStoreTests(StoreContract, unittest.TestCase):
+    def make_store(self):
+        return InMemoryURLStore()
+
+    def test_user_index_consistent(self):
+        store = self.store
+        store.create("a1", "https://a.com/1", "alice", 1.0)
+        store.create("a2", "https://a.com/2", "alice", 2.0)
+        store.create("b1", "https://b.com/1", "bob", 3.0)
+        store.delete("a1")
+        self.assertEqual(store.user_index["alice"], ["a2"])
+        store.delete("b1")
+        self.assertNotIn("bob", store.user_index)
+        store.delete_user("alice")
+        self.assertEqual(store.user_index, {})
+
+
+class LoggedInMemoryStoreTests(StoreContract, unittest.TestCase):
+    def make_store(self):
+        return self.open_store()
+
+    def open_store(self):
+        return LoggedInMemoryURLStore(os.path.join(self.tmpdir.name, 'oplog'), snapshot_interval=0)
+
+    def tearDown(self):
+        self.store.close()
+        super().tearDown()
+
+    def test_recovery_from_snapshot_and_log_tail(self):
+        store = self.store
+        store.create("a1", "https://a.com/1", "alice", 1.0)
+        store.create("a2", "https://a.com/2", "alice", 2.0)
+        store.record_click("a1", 5.0)
+        store.snapshot()
+        store.update_url("a1", "https://a.com/updated")
+        store.delete("a2")
+        store.create("b1", "https://b.com/1\x1f", "bob", 3.0)
+        store.create_many([("c1", "https://c.com/1", "carol", 4.0), ("c2", "https://c.com/2", "carol", 5.0)])
+        store.close()
+
+        self.store = self.open_store()
+        self.assertEqual(self.store.get("a1"), {"url": "https://a.com/updated", "username": "alice"})
+        self.assertEqual(self.store.get_stats("a1")["clicks"], 1)
+        self.assertIsNone(self.store.get("a2"))
+        self.assertEqual(self.store.get("b1"), {"url": "https://b.com/1\x1f", "username": "bob"})
+        self.assertEqual(self.store.list_urls("carol"), ["https://c.com/1", "https://c.com/2"])
+
+        self.store.snapshot()
+        self.store.close()
+        self.store = self.open_store()
+        self.assertEqual(sorted(self.store.records), ["a1", "b1", "c1", "c2"])
+        self.assertEqual(self.store.get("b1")["url"], "https://b.com/1\x1f")
+
+    def test_clicks_survive_a_restart(self):
+        store = self.store
+        store.create("a1", "https://a.com/1", "alice", 1.0)
+        store.snapshot()
+        # Clicks are not logged, so only snapshots keep them
+        store.add_clicks({"a1": (60, 7.0)})
+        store.snapshot()
+        store.add_clicks({"a1": (39, 8.0)})
+        store.record_click("a1", 9.0)
+        store.close()
+
+        self.store = self.open_store()
+        stats = self.store.get_stats("a1")
+        self.assertEqual((stats["clicks"], stats["last_accessed"]), (100, 9.0))
+
+    def test_snapshot_loop_saves_clicks(self):
+        self.store.create("a1", "https://a.com/1", "alice", 1.0)
+        self.store.close()
+        self.store = LoggedInMemoryURLStore(os.path.join(self.tmpdir.name, 'oplog'), snapshot_interval=0.01)
+        self.store.snapshot()
+        self.store.add_clicks({"a1": (5, 7.0)})
+        for _ in range(200):
+            segment, records = load_snapshot(self.store.snapshot_path)
+            clicks = [record[3] for record in records]
+            if clicks == [5]:
+                break
+            time.sleep(0.01)
+        self.assertEqual(clicks, [5])
+
+    def test_snapshot_loads_in_chunks(self):
+        path = os.path.join(self.tmpdir.name, 'snapshot')
+        records = [("id{}".format(i), "https://example.com/é/{}\x1e".format(i) * (i % 3 + 1), "user", i, 1.5 * i,
+                    None if i % 2 else 2.0 * i) for i in range(50)]
+        write_snapshot(path, records, 7, batch_size=7)
+        for chunk_size in (1, 10, 100, 1 << 20):
+            segment, loaded = load_snapshot(path, chunk_size)
+            self.assertEqual((segment, list(loaded)), (7, records))
+        write_snapshot(path, [], 8)
+        segment, loaded = load_snapshot(path, 10)
+        self.assertEqual((segment, list(loaded)), (8, []))
+
+
+class SQLiteStoreTests(StoreContract, unittest.TestCase):
+    def make_store(self):
+        return SQLiteURLStore(os.path.join(self.tmpdir.name, 'urls.db'))
+
+    def test_persists_across_instances(self):
+        self.store.create("a1", "https://example.com", "alice", 1.0)
+        reopened = SQLiteURLStore(os.path.join(self.tmpdir.name, 'urls.db'))
+        self.assertEqual(reopened.get("a1"), {"url": "https://example.com", "username": "alice"})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,189 @@
+import os
+import tempfile
+
+# Point the apps at scratch databases before they are imported, so the tests never touch
+# the ones in instance/
+test_databases = tempfile.TemporaryDirectory()
+os.environ['USERS_DB_URI'] = 'sqlite:///' + os.path.join(test_databases.name, 'users.db')
+os.environ['REVOCATION_DB'] = os.path.join(test_databases.name, 'revoked.db')
+
+import unittest
+import jwt
+import url_shortener
+from url_shortener import app
+from dedup_index import URLDedupIndex
+from authenticator import SECRET_KEY
+
+
+class BatchEndpointTests(unittest.TestCase):
+    def setUp(self):
+        self.app = app.test_client()
+        self.app.testing = True
+        self.headers = {'Authorization': jwt.generate_jwt('batch-tester', SECRET_KEY)}
+
+    def tearDown(self):
+        self.app.delete('/', headers=self.headers)
+
+    def test_batch_create(self):
+        urls = ['https://en.wikipedia.org/wiki/Docker_(software)', 'htInvalid_url/', '', 'www.uva.nl']
+        response = self.app.post('/_batch', json={'values': urls}, headers=self.headers)
+        self.assertEqual(response.status_code, 201)
+        results = response.get_json()['results']
+        self.assertEqual([result['status'] for result in results], [201, 400, 400, 201])
+
+        for url, result in zip(urls, results):
+            if result['status'] == 201:
+                redirect = self.app.get('/' + result['id'], headers=self.headers)
+                self.assertEqual(redirect.status_code, 301)
+                self.assertEqual(redirect.get_json()['value'], url)
+
+    def test_batch_create_rejects_bad_requests(self):
+        self.assertEqual(self.app.post('/_batch', json={'values': []}, headers=self.headers).status_code, 400)
+        self.assertEqual(self.app.post('/_batch', json={'values': ['x']}, headers=self.headers).status_code, 400)
+        self.assertEqual(self.app.post('/_batch', json={'values': ['www.uva.nl']},
+                                       headers={'Authorization': 'wrong'}).status_code, 403)
+
+    def create(self, urls, headers=None):
+        response = self.app.post('/_batch', json={'values': urls}, headers=headers or self.headers)
+        return [result['id'] for result in response.get_json()['results']]
+
+    def test_batch_update_delete_and_stats(self):
+        other = {'Authorization': jwt.generate_jwt('batch-other', SECRET_KEY)}
+        mine = self.create(['www.uva.nl', 'www.vu.nl'])
+        theirs = self.create(['www.google.com'], other)
+        try:
+            response = self.app.put('/_batch', headers=self.headers, json={'updates': [
+                {'id': mine[0], 'url': 'https://www.uva.nl/en'}, {'id': mine[1], 'url': 'bad'},
+                {'id': theirs[0], 'url': 'www.uva.nl'}, {'id': 'missing', 'url': 'www.uva.nl'}]})
+            self.assertEqual([r['status'] for r in response.get_json()['results']], [200, 400, 403, 404])
+            self.assertEqual(self.app.get('/' + mine[0], headers=self.headers).get_json()['value'],
+                             'https://www.uva.nl/en')
+
+            response = self.app.post('/_batch/stats', headers=self.headers, json={'ids': mine + theirs})
+            results = response.get_json()['results']
+            self.assertEqual([r['status'] for r in results], [200, 200, 403])
+            self.assertEqual(results[0]['clicks'], 1)
+            self.assertEqual(results[1]['url'], 'www.vu.nl')
+
+            response = self.app.delete('/_batch', headers=self.headers, json={'ids': mine + theirs + ['missing']})
+            self.assertEqual([r['status'] for r in response.get_json()['results']], [204, 204, 403, 404])
+            self.assertEqual(self.app.get('/' + mine[0], headers=self.headers).status_code, 404)
+            self.assertEqual(self.app.get('/' + theirs[0], headers=other).status_code, 301)
+        finally:
+            self.app.delete('/', headers=other)
+
+    def test_batch_ids_validation(self):
+        self.assertEqual(self.app.delete('/_batch', json={'ids': []}, headers=self.headers).status_code, 400)
+        self.assertEqual(self.app.post('/_batch/stats', json={'ids': [1]}, headers=self.headers).status_code, 400)
+        self.assertEqual(self.app.put('/_batch', json={'updates': [{}]}, headers=self.headers).status_code, 400)
+
+
+class DedupTests(unittest.TestCase):
+    def setUp(self):
+        self.app = app.test_client()
+        self.headers = {'Authorization': jwt.generate_jwt('dedup-tester', SECRET_KEY)}
+        self.previous, url_shortener.dedup_index = url_shortener.dedup_index, URLDedupIndex()
+
+    def tearDown(self):
+        self.app.delete('/', headers=self.headers)
+        url_shortener.dedup_index = self.previous
+
+    def create(self, url, headers=None):
+        response = self.app.post('/', json={'value': url}, headers=headers or self.headers)
+        return response.status_code, response.get_json()['id']
+
+    def test_same_url_returns_existing_id(self):
+        status, short_id = self.create('https://www.uva.nl/')
+        self.assertEqual(status, 201)
+        self.assertEqual(self.create('https://WWW.uva.nl'), (200, short_id))
+        # Not shared between users
+        other = {'Authorization': jwt.generate_jwt('dedup-other', SECRET_KEY)}
+        status, other_id = self.create('https://www.uva.nl/', other)
+        self.app.delete('/', headers=other)
+        self.assertEqual(status, 201)
+        self.assertNotEqual(other_id, short_id)
+
+    def test_update_and_delete_keep_index_consistent(self):
+        _, short_id = self.create('https://www.uva.nl')
+        self.app.put('/' + short_id, json={'url': 'https://www.vu.nl'}, headers=self.headers)
+        self.assertEqual(self.create('https://www.vu.nl'), (200, short_id))
+        status, new_id = self.create('https://www.uva.nl')
+        self.assertEqual(status, 201)
+        self.app.delete('/' + new_id, headers=self.headers)
+        status, newer_id = self.create('https://www.uva.nl')
+        self.assertEqual(status, 201)
+        self.assertNotEqual(newer_id, new_id)
+
+    def test_batch_create(self):
+        _, short_id = self.create('https://www.uva.nl')
+        response = self.app.post('/_batch', headers=self.headers,
+                                 json={'values': ['https://www.uva.nl/', 'www.vu.nl', 'www.vu.nl/', 'bad']})
+        self.assertEqual(response.status_code, 201)
+        results = response.get_json()['results']
+        self.assertEqual([r['status'] for r in results], [200, 201, 200, 400])
+        self.assertEqual(results[0]['id'], short_id)
+        self.assertEqual(results[1]['id'], results[2]['id'])
+        response = self.app.post('/_batch', headers=self.headers, json={'values': ['www.vu.nl']})
+        self.assertEqual(response.status_code, 200)
+
+    def test_url_that_urlsplit_rejects(self):
+        status, short_id = self.create('https://ab.c[d')
+        self.assertEqual(status, 201)
+        self.assertEqual(self.create('https://ab.c[d'), (200, short_id))
+        response = self.app.post('/_batch', headers=self.headers, json={'values': ['https://ab.c[d']})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['results'][0]['id'], short_id)
+
+
+class QueryParameterTests(unittest.TestCase):
+    def setUp(self):
+        self.app = app.test_client()
+        self.headers = {'Authorization': jwt.generate_jwt('query-tester', SECRET_KEY)}
+
+    def test_list_limit(self):
+        self.assertEqual(self.app.get('/?limit=10', headers=self.headers).status_code, 200)
+        for limit in ['0', '-1', 'x', '²', '1001']:
+            self.assertEqual(self.app.get('/?limit=' + limit, headers=self.headers).status_code, 400, limit)
+
+    def test_user_stats_do_not_shadow_short_ids(self):
+        response = self.app.get('/_stats', headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('unique_visitors', response.get_json())
+
+        # The counter engine can issue short IDs such as "stats"
+        url_shortener.store.create('stats', 'https://www.uva.nl', 'query-tester', 1.0)
+        if url_shortener.id_filter is not None:
+            url_shortener.id_filter.add('stats')
+        try:
+            self.assertEqual(self.app.get('/stats', headers=self.headers).status_code, 301)
+        finally:
+            self.app.delete('/stats', headers=self.headers)
+
+    def test_top_k(self):
+        self.assertEqual(self.app.get('/_top?k=5', headers=self.headers).status_code, 200)
+        for k in ['0', 'x', '²', '101']:
+            self.assertEqual(self.app.get('/_top?k=' + k, headers=self.headers).status_code, 400, k)
+
+        url_shortener.store.create('top', 'https://www.uva.nl', 'query-tester', 1.0)
+        if url_shortener.id_filter is not None:
+            url_shortener.id_filter.add('top')
+        try:
+            self.assertEqual(self.app.get('/top', headers=self.headers).status_code, 301)
+        finally:
+            self.app.delete('/top', headers=self.headers)
+
+    def test_click_series_range(self):
+        short_id = self.app.post('/', json={'value': 'https://www.uva.nl'}, headers=self.headers).get_json()['id']
+        try:
+            path = '/stats/{}?granularity=minute&'.format(short_id)
+            self.assertEqual(self.app.get(path + 'from=0&to=60', headers=self.headers).status_code, 200)
+            for query in ['to=inf', 'to=-inf', 'from=nan', 'to=1e400', 'from=x']:
+                response = self.app.get(path + query, headers=self.headers)
+                self.assertEqual(response.status_code, 400, query)
+                self.assertEqual(response.get_json()['error'], 'from and to must be Unix timestamps', query)
+        finally:
+            self.app.delete('/' + short_id, headers=self.headers)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import csv
+import os
+import random
+import re
+import unittest
+from url_validator import is_valid_url, url_validator
+
+
+# The pattern the shortener used before; the validator must accept exactly the same strings
+REFERENCE_REGEX = re.compile(
+    r'^(https?://(?:www\.|(?!www))[a-zA-Z0-9][a-zA-Z0-9-]+[a-zA-Z0-9]\.[^\s]{2,}|'
+    r'www\.[a-zA-Z0-9][a-zA-Z0-9-]+[a-zA-Z0-9]\.[^\s]{2,}|'
+    r'https?://(?:www\.|(?!www))[a-zA-Z0-9]+\.[^\s]{2,}|'
+    r'www\.[a-zA-Z0-9]+\.[^\s]{2,})$',
+    re.UNICODE
+)
+
+
+class URLValidatorTests(unittest.TestCase):
+    def assertSameAsReference(self, url):
+        self.assertEqual(is_valid_url(url), bool(REFERENCE_REGEX.match(url)), repr(url))
+
+    def test_read_from_csv_cases(self):
+        with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'read_from.csv')) as f:
+            rows = list(csv.DictReader(f))
+        for row in rows:
+            for column in ('url_to_shorten_1', 'url_to_shorten_2', 'url_after_update'):
+                self.assertTrue(is_valid_url(row[column]), row[column])
+            self.assertFalse(is_valid_url(row['invalid_url']))
+            for url in row.values():
+                self.assertSameAsReference(url)
+
+    def test_edge_cases(self):
+        for url in ['www.uva.nl', 'http://www.com', 'http://wwwx.com', 'https://WWW.uva.nl', 'http://a-.com',
+                    'http://-a.com', 'http://a-b.c', 'http://a-b.cd', 'www.a.b\n', 'www.a.bc\n', 'www.a.bc\n\n',
+                    'www.a.b c', 'www.a.b c', 'www.é.com', 'http://www.www.com', 'ftp://a.com', '']:
+            self.assertSameAsReference(url)
+        self.assertFalse(is_valid_url(None))
+        self.assertFalse(is_valid_url(42))
+
+    def test_random_strings(self):
+        pieces = ['http://', 'https://', 'www.', 'www', 'w', '.', '-', 'a', 'Z', '9', 'é', ' ', '\n', '\t',
+                  ' ', '/', '://', 'ab']
+        rng = random.Random(0)
+        for _ in range(20000):
+            self.assertSameAsReference(''.join(rng.choice(pieces) for _ in range(rng.randint(0, 8))))
+
+    def test_cached_validator(self):
+        validate = url_validator(cache_size=2)
+        self.assertTrue(validate('www.uva.nl'))
+        self.assertTrue(validate('www.uva.nl'))
+        self.assertFalse(validate('htInvalid_url/'))
+        self.assertFalse(validate(['not', 'hashable']))
+        self.assertIs(url_validator(0), is_valid_url)
+
+
+if __name__ == '__main__':
+    unittest.main()
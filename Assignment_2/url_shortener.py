@@ -1,96 +1,344 @@
-import re
+import os
+import math
 import time
-import threading
-from flask import Flask, request, jsonify
-import base62
+from flask import Flask, Response, request, jsonify
 from authenticator import SECRET_KEY
 import jwt
+from machine_lease import MachineIDLease
+from id_engines import Base62SnowflakeIDGenerator, CounterIDEngine
+from storage import InMemoryURLStore, LoggedInMemoryURLStore, SQLiteURLStore
+from click_counter import ClickCounter
+from click_histogram import ClickHistograms
+from hyperloglog import UniqueVisitors
+from heavy_hitters import TopLinks
+from response_cache import ResponseCache
+from bloom_filter import CountingBloomFilter
+from dedup_index import URLDedupIndex, normalize_url
+from url_validator import url_validator
+from revocation import RevocationList
 
 
-class Base62SnowflakeIDGenerator:
-    def __init__(self, machine_id):
-        self.machine_id = machine_id
-        self.sequence = 0
-        self.last_timestamp = -1
-        self.lock = threading.Lock()
-
-        self.timestamp_bits = 31
-        self.machine_id_bits = 5
-        self.sequence_bits = 5
+app = Flask(__name__)
 
-        self.max_machine_id = (1 << self.machine_id_bits) - 1
-        self.max_sequence = (1 << self.sequence_bits) - 1
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+MAX_BATCH_SIZE = 10000
+
+# ID strategy: "snowflake" (time based) or "counter" (scrambled counter blocks)
+app.config['ID_ENGINE'] = os.environ.get('ID_ENGINE', 'snowflake')
+app.config['ID_ENGINE_KEY'] = os.environ.get('ID_ENGINE_KEY', SECRET_KEY)
+app.config['ID_ENGINE_DB'] = os.path.join(app.instance_path, 'leases.db')
+# URL store: "memory" (lost on restart), "oplog" (memory + operation log and snapshots)
+# or "sqlite" (shared by all worker processes)
+app.config['URL_STORE'] = os.environ.get('URL_STORE', 'memory')
+app.config['URL_STORE_DB'] = os.environ.get('URL_STORE_DB', os.path.join(app.instance_path, 'urls.db'))
+app.config['URL_STORE_LOG_DIR'] = os.environ.get('URL_STORE_LOG_DIR', os.path.join(app.instance_path, 'oplog'))
+os.makedirs(app.instance_path, exist_ok=True)
+
+if app.config['URL_STORE'] == 'memory':
+    store = InMemoryURLStore()
+elif app.config['URL_STORE'] == 'oplog':
+    store = LoggedInMemoryURLStore(app.config['URL_STORE_LOG_DIR'])
+elif app.config['URL_STORE'] == 'sqlite':
+    store = SQLiteURLStore(app.config['URL_STORE_DB'])
+else:
+    raise ValueError("Unknown URL_STORE: {}".format(app.config['URL_STORE']))
+
+# Serialized redirect responses; a TTL limits staleness when other processes share the store
+app.config['REDIRECT_CACHE_SIZE'] = int(os.environ.get('REDIRECT_CACHE_SIZE', 10000))
+app.config['REDIRECT_CACHE_TTL'] = float(os.environ.get(
+    'REDIRECT_CACHE_TTL', 5 if app.config['URL_STORE'] == 'sqlite' else 0)) or None
+redirect_cache = ResponseCache(app.config['REDIRECT_CACHE_SIZE'], app.config['REDIRECT_CACHE_TTL'])
+
+# Filter of live short IDs so unknown IDs get a 404 without a store lookup. It only sees this
+# process's creates, so it is off by default for the SQLite store, which other processes share.
+app.config['NEGATIVE_FILTER'] = os.environ.get(
+    'NEGATIVE_FILTER', '0' if app.config['URL_STORE'] == 'sqlite' else '1') == '1'
+app.config['NEGATIVE_FILTER_CAPACITY'] = int(os.environ.get('NEGATIVE_FILTER_CAPACITY', 1000000))
+app.config['NEGATIVE_FILTER_ERROR_RATE'] = float(os.environ.get('NEGATIVE_FILTER_ERROR_RATE', 0.01))
+id_filter = None
+if app.config['NEGATIVE_FILTER']:
+    id_filter = CountingBloomFilter(app.config['NEGATIVE_FILTER_CAPACITY'], app.config['NEGATIVE_FILTER_ERROR_RATE'])
+    for existing_id in store.iter_ids():
+        id_filter.add(existing_id)
+
+# Access tokens revoked by the authenticator (logout, password change), polled once a second
+app.config['REVOCATION_DB'] = os.environ.get('REVOCATION_DB', os.path.join(app.instance_path, 'revoked.db'))
+jwt.revocations = RevocationList(app.config['REVOCATION_DB'])
+
+# Optional memo in front of the URL validator for clients that resend the same URLs
+app.config['URL_VALIDATOR_CACHE_SIZE'] = int(os.environ.get('URL_VALIDATOR_CACHE_SIZE', 0))
+valid_url = url_validator(app.config['URL_VALIDATOR_CACHE_SIZE'])
+
+# Optional dedup: shortening a URL the user already shortened returns the existing ID
+app.config['DEDUP'] = os.environ.get('DEDUP', '0') == '1'
+dedup_index = None
+if app.config['DEDUP']:
+    dedup_index = URLDedupIndex()
+    existing_ids = list(store.iter_ids())
+    for i in range(0, len(existing_ids), MAX_BATCH_SIZE):
+        for existing_id, entry in store.get_many(existing_ids[i:i + MAX_BATCH_SIZE]).items():
+            dedup_index.add(existing_id, entry['url'], entry['username'])
+
+# Redirects count clicks in memory; they reach the store in batches
+click_counter = ClickCounter(store)
+# Per-minute/hour/day click series per link, kept in memory
+click_histograms = ClickHistograms()
+# Approximate distinct visitors per link (client address + user agent), kept in memory
+unique_visitors = UniqueVisitors()
+# Hottest links over the last 10 minutes, globally and per user
+top_links = TopLinks(slot_seconds=60, slots=10)
+MAX_TOP_K = 100
+
+if app.config['ID_ENGINE'] == 'snowflake':
+    # Every worker process leases its own machine_id (10 bits in the millisecond layout)
+    machine_lease = MachineIDLease(app.config['ID_ENGINE_DB'], max_machine_id=(1 << 10) - 1)
+    id_generator = Base62SnowflakeIDGenerator.millisecond_layout(machine_id=machine_lease.acquire(), wait_mode="sleep",
+                                                                 lease=machine_lease)
+elif app.config['ID_ENGINE'] == 'counter':
+    id_generator = CounterIDEngine(app.config['ID_ENGINE_DB'], key=app.config['ID_ENGINE_KEY'])
+else:
+    raise ValueError("Unknown ID_ENGINE: {}".format(app.config['ID_ENGINE']))
+
+def existing_short_id(username, url):
+    # Index hit, checked against the store in case another process changed the link
+    short_id = dedup_index.lookup(username, url)
+    if short_id is None:
+        return None
+    entry = store.get(short_id)
+    if entry is not None and entry['username'] == username and normalize_url(entry['url']) == normalize_url(url):
+        return short_id
+    dedup_index.remove([short_id])
+    return None
+
+
+def shorten(url, username):
+    short_id = str(id_generator.generate_id())
+    store.create(short_id, url, username, time.time())
+    if id_filter is not None:
+        id_filter.add(short_id)
+    return short_id
 
-        self.timestamp_shift = self.machine_id_bits + self.sequence_bits
-        self.machine_id_shift = self.sequence_bits
 
-    def current_timestamp(self):
-        return int(time.time())
+@app.route('/', methods=['POST'])
+def create_short_url():
 
-    def wait_for_next_timestamp(self, last_timestamp):
-        timestamp = self.current_timestamp()
-        while timestamp <= last_timestamp:
-            timestamp = self.current_timestamp()
-        return timestamp
+    username = jwt.has_permission(SECRET_KEY)
+    if username:
+        data = request.get_json()
+        url = data.get('value')
+        if not url:
+            return jsonify({"error": "URL is required"}), 400
+        if not valid_url(url):
+            return jsonify({'error': 'Invalid URL'}), 400
 
-    def generate_id(self):
-        with self.lock:
-            timestamp = self.current_timestamp()
+        if dedup_index is None:
+            return jsonify({"id": shorten(url, username)}), 201
+        with dedup_index.lock_for(username, url):
+            short_id = existing_short_id(username, url)
+            if short_id is not None:
+                return jsonify({"id": short_id}), 200
+            short_id = shorten(url, username)
+            dedup_index.add(short_id, url, username)
+        return jsonify({"id": short_id}), 201
+    
+    else:
+        return jsonify({"error": "Forbidden"}), 403
 
-            if timestamp == self.last_timestamp:
-                self.sequence = (self.sequence + 1) & self.max_sequence
-                if self.sequence == 0:
-                    timestamp = self.wait_for_next_timestamp(self.last_timestamp)
-            else:
-                self.sequence = 0
 
-            self.last_timestamp = timestamp
+def create_many(urls, username):
+    short_ids = id_generator.generate_ids(len(urls)) if urls else []
+    timestamp = time.time()
+    store.create_many([(short_id, url, username, timestamp) for short_id, url in zip(short_ids, urls)])
+    if id_filter is not None:
+        for short_id in short_ids:
+            id_filter.add(short_id)
+    return short_ids
 
-            id = (
-                    (timestamp << self.timestamp_shift) |
-                    (self.machine_id << self.machine_id_shift) |
-                    self.sequence
-            )
 
-            id = base62.encode(id)
-            return id
+@app.route('/_batch', methods=['POST'])
+def create_short_urls():
+    # Body: {"values": [url, ...]}; answers with one result per URL, in order
+    username = jwt.has_permission(SECRET_KEY)
+    if username:
+        data = request.get_json(silent=True)
+        urls = data.get('values') if isinstance(data, dict) else None
+        if not isinstance(urls, list) or not urls:
+            return jsonify({"error": "values must be a non-empty list of URLs"}), 400
+        if len(urls) > MAX_BATCH_SIZE:
+            return jsonify({"error": "At most {} URLs per request".format(MAX_BATCH_SIZE)}), 400
+
+        results = []
+        valid = []
+        for url in urls:
+            if not url or not isinstance(url, str):
+                results.append({"status": 400, "error": "URL is required"})
+            elif not valid_url(url):
+                results.append({"status": 400, "error": "Invalid URL"})
+            else:
+                results.append(None)
+                valid.append(url)
+
+        if dedup_index is None:
+            short_ids = create_many(valid, username)
+            created = iter(short_ids)
+            results = [result if result is not None else {"status": 201, "id": next(created)} for result in results]
+            return jsonify({"results": results}), 201 if short_ids else 400
+
+        with dedup_index.lock_all(username, valid):
+            # Existing links, then one new ID per distinct normalized URL
+            existing = {}
+            new = {}
+            for url in valid:
+                key = normalize_url(url)
+                if key not in existing and key not in new:
+                    short_id = existing_short_id(username, url)
+                    if short_id is not None:
+                        existing[key] = short_id
+                    else:
+                        new[key] = url
+            short_ids = create_many(list(new.values()), username)
+            for short_id, url in zip(short_ids, new.values()):
+                dedup_index.add(short_id, url, username)
+        minted = dict(zip(new, short_ids))
+
+        pending = iter(valid)
+        for i, result in enumerate(results):
+            if result is None:
+                key = normalize_url(next(pending))
+                if key in minted:
+                    results[i] = {"status": 201, "id": minted.pop(key)}
+                    # Later duplicates within the batch get the ID just created
+                    existing[key] = results[i]["id"]
+                else:
+                    results[i] = {"status": 200, "id": existing[key]}
+        return jsonify({"results": results}), 201 if short_ids else 200 if existing else 400
+    else:
+        return jsonify({"error": "Forbidden"}), 403
 
 
-# Source: https://stackoverflow.com/a/17773849
-URL_REGEX = re.compile(
-    r'^(https?://(?:www\.|(?!www))[a-zA-Z0-9][a-zA-Z0-9-]+[a-zA-Z0-9]\.[^\s]{2,}|'
-    r'www\.[a-zA-Z0-9][a-zA-Z0-9-]+[a-zA-Z0-9]\.[^\s]{2,}|'
-    r'https?://(?:www\.|(?!www))[a-zA-Z0-9]+\.[^\s]{2,}|'
-    r'www\.[a-zA-Z0-9]+\.[^\s]{2,})$',
-    re.UNICODE
-)
+def batch_ids(data):
+    # Parses {"ids": [short_id, ...]}; returns (ids, error response)
+    short_ids = data.get('ids') if isinstance(data, dict) else None
+    if not isinstance(short_ids, list) or not short_ids or not all(isinstance(i, str) for i in short_ids):
+        return None, (jsonify({"error": "ids must be a non-empty list of short IDs"}), 400)
+    if len(short_ids) > MAX_BATCH_SIZE:
+        return None, (jsonify({"error": "At most {} IDs per request".format(MAX_BATCH_SIZE)}), 400)
+    return short_ids, None
 
-app = Flask(__name__)
 
-url_mapping = {}
-stats_mapping = {}
-id_generator = Base62SnowflakeIDGenerator(machine_id=1)
+@app.route('/_batch', methods=['PUT'])
+def update_short_urls():
+    # Body: {"updates": [{"id": short_id, "url": url}, ...]}; one result per update, in order
+    username = jwt.has_permission(SECRET_KEY)
+    if username:
+        data = request.get_json(silent=True)
+        updates = data.get('updates') if isinstance(data, dict) else None
+        if not isinstance(updates, list) or not updates:
+            return jsonify({"error": "updates must be a non-empty list"}), 400
+        if len(updates) > MAX_BATCH_SIZE:
+            return jsonify({"error": "At most {} updates per request".format(MAX_BATCH_SIZE)}), 400
+        if not all(isinstance(u, dict) and isinstance(u.get('id'), str) for u in updates):
+            return jsonify({"error": "Every update needs an id"}), 400
+
+        # Ownership for the whole batch in one lookup
+        entries = store.get_many(list(dict.fromkeys(u['id'] for u in updates)))
+        results = []
+        valid = []
+        for u in updates:
+            short_id, url = u['id'], u.get('url')
+            entry = entries.get(short_id)
+            if entry is None:
+                results.append({"id": short_id, "status": 404, "error": "Not found"})
+            elif entry['username'] != username:
+                results.append({"id": short_id, "status": 403, "error": "Forbidden"})
+            elif not url or not isinstance(url, str):
+                results.append({"id": short_id, "status": 400, "error": "Missing URL"})
+            elif not valid_url(url):
+                results.append({"id": short_id, "status": 400, "error": "Invalid URL"})
+            else:
+                results.append({"id": short_id, "status": 200})
+                valid.append((short_id, url))
+
+        updated = set(store.update_many(valid))
+        redirect_cache.invalidate(updated)
+        if dedup_index is not None:
+            dedup_index.remove(updated)
+            for short_id, url in valid:
+                if short_id in updated:
+                    dedup_index.add(short_id, url, username)
+        for result in results:
+            # Deleted between the lookup and the transaction
+            if result["status"] == 200 and result["id"] not in updated:
+                result.update(status=404, error="Not found")
+        return jsonify({"results": results}), 200
+    else:
+        return jsonify({"error": "Forbidden: No permission"}), 403
 
-@app.route('/', methods=['POST'])
-def create_short_url():
 
+@app.route('/_batch', methods=['DELETE'])
+def delete_short_urls():
+    # Body: {"ids": [short_id, ...]}; one result per ID, in order
     username = jwt.has_permission(SECRET_KEY)
     if username:
-        data = request.get_json()
-        url = data.get('value')
-        if not url:
-            return jsonify({"error": "URL is required"}), 400
-        if not re.match(URL_REGEX, url):
-            return jsonify({'error': 'Invalid URL'}), 400
+        short_ids, error = batch_ids(request.get_json(silent=True))
+        if error:
+            return error
+
+        entries = store.get_many(list(dict.fromkeys(short_ids)))
+        owned = [short_id for short_id, entry in entries.items() if entry['username'] == username]
+        deleted = store.delete_many(owned)
+        if id_filter is not None:
+            for short_id in deleted:
+                id_filter.remove(short_id)
+        if dedup_index is not None:
+            dedup_index.remove(deleted)
+        redirect_cache.invalidate(deleted)
+        click_histograms.discard(deleted)
+        unique_visitors.discard(deleted)
+
+        deleted = set(deleted)
+        results = []
+        for short_id in short_ids:
+            if short_id in deleted:
+                results.append({"id": short_id, "status": 204})
+                # A repeated ID is already gone the second time
+                deleted.discard(short_id)
+            elif short_id in entries and entries[short_id]['username'] != username:
+                results.append({"id": short_id, "status": 403, "error": "Forbidden"})
+            else:
+                results.append({"id": short_id, "status": 404, "error": "Not found"})
+        return jsonify({"results": results}), 200
+    else:
+        return jsonify({"error": "Forbidden: No permission"}), 403
 
-        short_id = str(id_generator.generate_id())
-        timestamp = time.time()
-        url_mapping[short_id] = {"url":url,'username':username}
-        stats_mapping[short_id] = {"clicks": 0, "created_at": timestamp, "last_accessed": None,'username':username}
-        return jsonify({"id": short_id}), 201
-    
+
+@app.route('/_batch/stats', methods=['POST'])
+def get_short_url_stats():
+    # Body: {"ids": [short_id, ...]}; one result per ID, in order
+    username = jwt.has_permission(SECRET_KEY)
+    if username:
+        short_ids, error = batch_ids(request.get_json(silent=True))
+        if error:
+            return error
+
+        unique_ids = list(dict.fromkeys(short_ids))
+        entries = store.get_many(unique_ids)
+        stats = click_counter.get_stats_many([short_id for short_id in unique_ids
+                                              if short_id in entries and entries[short_id]['username'] == username])
+        results = []
+        for short_id in short_ids:
+            if short_id in stats:
+                result = dict(stats[short_id], id=short_id, status=200, url=entries[short_id]['url'],
+                              unique_visitors=unique_visitors.estimate(short_id))
+            elif short_id in entries and entries[short_id]['username'] != username:
+                result = {"id": short_id, "status": 403, "error": "Forbidden"}
+            else:
+                result = {"id": short_id, "status": 404, "error": "Not found"}
+            results.append(result)
+        return jsonify({"results": results}), 200
     else:
-        return jsonify({"error": "Forbidden"}), 403
+        return jsonify({"error": "Forbidden: No permission"}), 403
 
 
 @app.route('/<short_id>', methods=['GET'])
@@ -99,14 +347,27 @@ def redirect_to_url(short_id):
     username = jwt.has_permission(SECRET_KEY)
 
     if username:
-        if not (short_id in url_mapping):
+        if id_filter is not None and not id_filter.might_contain(short_id):
             return jsonify({"error": "Not found"}), 404
+        cached = redirect_cache.get(short_id)
+        if cached is not None:
+            body, owner = cached
+        else:
+            epoch = redirect_cache.epoch
+            entry = store.get(short_id)
+            if entry is None:
+                return jsonify({"error": "Not found"}), 404
+            body, owner = jsonify({"value": entry['url']}).get_data(), entry['username']
+            redirect_cache.put(short_id, body, owner, epoch)
         # Can only redirect to his/her own url  
-        if url_mapping[short_id]['username'] != username:
+        if owner != username:
             return jsonify({"error": "Forbidden: You can only redirect to your own url"}), 403
-        stats_mapping[short_id]["clicks"] += 1
-        stats_mapping[short_id]["last_accessed"] = time.time()
-        return jsonify({"value": url_mapping[short_id]['url']}), 301
+        now = time.time()
+        click_counter.record(short_id, now)
+        click_histograms.record(short_id, now)
+        unique_visitors.record(short_id, "{}|{}".format(request.remote_addr, request.headers.get('User-Agent', '')))
+        top_links.record(short_id, username, now)
+        return Response(body, status=301, mimetype='application/json')
     else:
         return jsonify({"error": "Forbidden: No permission"}), 403
 
@@ -116,10 +377,11 @@ def update_url(short_id):
     username = jwt.has_permission(SECRET_KEY)
 
     if username:
-        if not (short_id in url_mapping):
+        entry = store.get(short_id)
+        if entry is None:
             return jsonify({"error": "Not found"}), 404
         
-        if url_mapping[short_id]['username'] != username:
+        if entry['username'] != username:
             return jsonify({"error": "Forbidden: You can only update to your own url"}), 403
 
         data = request.get_json(force=True)
@@ -128,10 +390,14 @@ def update_url(short_id):
             return jsonify({'error': 'Missing URL'}), 400
 
         new_url = data['url']
-        if not re.match(URL_REGEX, new_url):
+        if not valid_url(new_url):
             return jsonify({'error': 'Invalid URL'}), 400
 
-        url_mapping[short_id]["url"] = new_url
+        store.update_url(short_id, new_url)
+        redirect_cache.invalidate([short_id])
+        if dedup_index is not None:
+            dedup_index.remove([short_id])
+            dedup_index.add(short_id, new_url, username)
         return jsonify({'value': 'Updated successfully'}), 200
     else:
         return jsonify({"error": "Forbidden: No permission"}), 403
@@ -143,14 +409,20 @@ def delete_url(short_id):
     username = jwt.has_permission(SECRET_KEY)
 
     if username:
-        if short_id not in url_mapping:
+        entry = store.get(short_id)
+        if entry is None:
             return jsonify({'error': 'Not found'}), 404
         
-        if url_mapping[short_id]['username'] != username:
+        if entry['username'] != username:
             return jsonify({"error": "Forbidden: You can only delete to your own url"}), 403
         
-        del url_mapping[short_id]
-        del stats_mapping[short_id]
+        if store.delete(short_id) and id_filter is not None:
+            id_filter.remove(short_id)
+        if dedup_index is not None:
+            dedup_index.remove([short_id])
+        redirect_cache.invalidate([short_id])
+        click_histograms.discard([short_id])
+        unique_visitors.discard([short_id])
         return '', 204
     else:
         return jsonify({'error': 'Forbidden: No permission'}), 403
@@ -161,13 +433,87 @@ def get_url_stats(short_id):
     username = jwt.has_permission(SECRET_KEY)
 
     if username:
-        if short_id not in url_mapping:
+        entry = store.get(short_id)
+        if entry is None:
             return jsonify({"error": "Not found"}), 404
         
-        if url_mapping[short_id]['username'] != username:
+        if entry['username'] != username:
             return jsonify({"error": "Forbidden: You can only read your own url"}), 403
         
-        return jsonify(url_mapping[short_id]), 200
+        stats = click_counter.get_stats(short_id)
+        if stats is None:
+            return jsonify({"error": "Not found"}), 404
+        stats["url"] = entry["url"]
+        stats["unique_visitors"] = unique_visitors.estimate(short_id)
+
+        # Optional click series: ?granularity=minute|hour|day&from=<unix time>&to=<unix time>
+        granularity = request.args.get('granularity')
+        if granularity is not None:
+            try:
+                end = float(request.args.get('to', time.time()))
+                start = float(request.args.get('from', 0))
+                # float() also takes "inf", "nan" and "1e400"
+                if not (math.isfinite(start) and math.isfinite(end)):
+                    raise ValueError
+            except ValueError:
+                return jsonify({"error": "from and to must be Unix timestamps"}), 400
+            try:
+                buckets = click_histograms.query(short_id, granularity, start, end)
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
+            stats["series"] = {"granularity": granularity,
+                               "buckets": [{"start": bucket_start, "clicks": clicks}
+                                           for bucket_start, clicks in buckets]}
+        return jsonify(stats), 200
+    else:
+        return jsonify({'error': 'Forbidden: No permission'}), 403
+
+
+# Underscore paths cannot clash with short IDs, which are base62
+@app.route('/_stats', methods=['GET'])
+def get_user_stats():
+    username = jwt.has_permission(SECRET_KEY)
+    if username:
+        entries, _ = store.list_page(username)
+        short_ids = [short_id for short_id, _ in entries]
+        return jsonify({'links': len(short_ids),
+                        'unique_visitors': unique_visitors.estimate_total(short_ids)}), 200
+    else:
+        return jsonify({'error': 'Forbidden: No permission'}), 403
+
+
+@app.route('/_top', methods=['GET'])
+def get_top_urls():
+    username = jwt.has_permission(SECRET_KEY)
+    if username:
+        # ?k=N&scope=user|global
+        k = request.args.get('k', '10')
+        scope = request.args.get('scope', 'user')
+        if not (k.isascii() and k.isdigit()) or not 1 <= int(k) <= MAX_TOP_K:
+            return jsonify({'error': 'k must be between 1 and {}'.format(MAX_TOP_K)}), 400
+        if scope not in ('user', 'global'):
+            return jsonify({'error': 'scope must be user or global'}), 400
+
+        hottest = top_links.top(MAX_TOP_K, time.time(), username if scope == 'user' else None)
+        top = []
+        for short_id, clicks in hottest:
+            # Links deleted within the window are still in the summaries
+            if store.get(short_id) is not None:
+                top.append({'id': short_id, 'clicks': clicks})
+                if len(top) == int(k):
+                    break
+        return jsonify({'top': top}), 200
+    else:
+        return jsonify({'error': 'Forbidden: No permission'}), 403
+
+
+@app.route('/_cache', methods=['GET'])
+def get_cache_stats():
+    if jwt.has_permission(SECRET_KEY):
+        stats = redirect_cache.stats()
+        if id_filter is not None:
+            stats["negative_filter"] = id_filter.stats()
+        return jsonify(stats), 200
     else:
         return jsonify({'error': 'Forbidden: No permission'}), 403
 
@@ -176,8 +522,21 @@ def get_url_stats(short_id):
 def list_urls():
     username = jwt.has_permission(SECRET_KEY)
     if username:
-        filtered_urls = [entry['url'] for entry in url_mapping.values() if entry["username"] == username]
-        return jsonify({'urls': filtered_urls}), 200
+        # Optional cursor pagination: ?limit=N&cursor=<last short ID of the previous page>
+        limit = request.args.get('limit')
+        cursor = request.args.get('cursor') or None
+        if limit is not None:
+            # isdigit() alone also accepts digits such as "²" that int() rejects
+            if not (limit.isascii() and limit.isdigit()) or not 1 <= int(limit) <= MAX_PAGE_SIZE:
+                return jsonify({'error': 'limit must be between 1 and {}'.format(MAX_PAGE_SIZE)}), 400
+            limit = int(limit)
+        elif cursor is not None:
+            limit = DEFAULT_PAGE_SIZE
+
+        entries, next_cursor = store.list_page(username, limit, cursor)
+        return jsonify({'urls': [url for _, url in entries],
+                        'ids': [short_id for short_id, _ in entries],
+                        'next_cursor': next_cursor}), 200
     else:
         return jsonify({'error': 'Forbidden: No permission'}), 403
 
@@ -186,12 +545,16 @@ def list_urls():
 def delete_user_urls():
     username = jwt.has_permission(SECRET_KEY)
     if username:
-        urls_to_delete = [key for key, value in url_mapping.items() if value.get("username") == username]
-        
-        for key in urls_to_delete:
-            url_mapping.pop(key, None)  
-            stats_mapping.pop(key, None)  
-
+        deleted = store.delete_user(username)
+        if id_filter is not None:
+            for short_id in deleted:
+                id_filter.remove(short_id)
+        if dedup_index is not None:
+            dedup_index.remove(deleted)
+        redirect_cache.invalidate(deleted)
+        click_histograms.discard(deleted)
+        unique_visitors.discard(deleted)
+        top_links.discard_user(username)
         return '', 404  
     else:
         return jsonify({'error': 'Forbidden: No permission'}), 403
@@ -0,0 +1,49 @@
+from functools import lru_cache
+
+
+# Accepts the same strings as the StackOverflow pattern the shortener used before
+# (https://stackoverflow.com/a/17773849) with re.match:
+#
+#   ^(https?://(?:www\.|(?!www))[a-zA-Z0-9][a-zA-Z0-9-]+[a-zA-Z0-9]\.[^\s]{2,}|
+#     www\.[a-zA-Z0-9][a-zA-Z0-9-]+[a-zA-Z0-9]\.[^\s]{2,}|
+#     https?://(?:www\.|(?!www))[a-zA-Z0-9]+\.[^\s]{2,}|
+#     www\.[a-zA-Z0-9]+\.[^\s]{2,})$
+#
+# that is: "http(s)://" or "www.", then one hostname label up to the first dot (after the
+# scheme, a host starting with "www" must start with "www."), then at least two
+# non-whitespace characters. Each step is a single pass of a str method, so the cost is
+# linear in the length of the URL whatever it contains.
+def is_valid_url(url):
+    if not isinstance(url, str):
+        return False
+    # `$` also matches before a final newline
+    if url.endswith("\n"):
+        url = url[:-1]
+    if url.startswith("https://"):
+        host = url[8:]
+    elif url.startswith("http://"):
+        host = url[7:]
+    elif url.startswith("www."):
+        host = url[4:]
+    else:
+        return False
+    if host.startswith("www") and url[0] == "h":
+        if not host.startswith("www."):
+            return False
+        host = host[4:]
+
+    label, dot, tail = host.partition(".")
+    # label: [a-zA-Z0-9] at both ends, [a-zA-Z0-9-] in between
+    if not (dot and label.isascii() and label.replace("-", "").isalnum()
+            and label[0] != "-" and label[-1] != "-"):
+        return False
+    # split() hands back [tail] itself when there is no whitespace in it
+    return len(tail) >= 2 and tail.split() == [tail]
+
+
+def url_validator(cache_size=0):
+    # is_valid_url, optionally behind an LRU memo for clients that resend the same URLs
+    if not cache_size:
+        return is_valid_url
+    cached = lru_cache(maxsize=cache_size)(is_valid_url)
+    return lambda url: isinstance(url, str) and cached(url)